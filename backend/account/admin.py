@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomUser
+from .models import CustomUser, OutgoingEmail
 from .forms import CustomUserCreationForm, CustomUserChangeForm
 from django.contrib.auth.admin import UserAdmin
 
@@ -8,3 +8,4 @@ from django.contrib.auth.admin import UserAdmin
 
 
 admin.site.register(CustomUser)
+admin.site.register(OutgoingEmail)
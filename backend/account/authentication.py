@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import USER_CLAIMS
+
+# What authentication and permission checks read from request.user. Only
+# these are cached: the password hash, verification token and email never
+# leave the database, and load lazily if a view does need them.
+CACHED_USER_FIELDS = ('id', 'is_active', 'is_staff', 'role', 'is_email_verified')
+# Permissions that only ask whether there is a user, which a token answers.
+# Anything stricter (IsAdminUser, ...) must not trust claims that may be as
+# old as the token, so it gets the user from the database.
+CLAIMS_PERMISSIONS = (AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly)
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that avoids loading ``CustomUser`` per request.
+
+    Safe requests to views with ``stateless_auth = True``, whose permissions
+    are all in ``CLAIMS_PERMISSIONS``, get a ``TokenUser`` built from the
+    claims ``UserRefreshToken`` embeds. Everything else gets a
+    ``CustomUser`` rebuilt from ``CACHED_USER_FIELDS``, cached for
+    ``AUTH_USER_CACHE_TIMEOUT`` seconds; ``account.signals`` drops the entry
+    whenever the user is saved. A queryset ``update()`` sends no signal, so
+    deactivating a user that way takes up to the timeout to apply.
+    """
+    def authenticate(self, request):
+        self.request = request
+        return super().authenticate(request)
+
+    def can_use_claims(self, validated_token):
+        view = (getattr(self.request, 'parser_context', None) or {}).get('view')
+        return (
+            self.request.method in SAFE_METHODS
+            and getattr(view, 'stateless_auth', False)
+            and all(permission in CLAIMS_PERMISSIONS for permission in view.permission_classes)
+            and all(claim in validated_token for claim in USER_CLAIMS)
+        )
+
+    def get_user(self, validated_token):
+        if self.can_use_claims(validated_token):
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Compares against the password hash, which is not cached.
+            return super().get_user(validated_token)
+
+        key = user_cache_key(validated_token.get(api_settings.USER_ID_CLAIM))
+        fields = cache.get(key)
+        if fields is None:
+            # Raises for unknown and inactive users, so only active ones are cached.
+            user = super().get_user(validated_token)
+            cache.set(key, {name: getattr(user, name) for name in CACHED_USER_FIELDS}, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+        # Like a queryset with only(CACHED_USER_FIELDS): the other fields are deferred.
+        return get_user_model().from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
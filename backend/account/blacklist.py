@@ -0,0 +1,120 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+PRUNE_BATCH_SIZE = 1000
+VERSION_KEY = 'token-blacklist:version'
+ENTRY_TIMEOUT = 60 * 60 * 24
+# Catching up on more entries than this is slower than rebuilding from the database.
+MAX_CATCH_UP = 1000
+
+
+class BloomFilter:
+    """Set membership with no false negatives and roughly ``error_rate`` false positives at ``capacity`` items."""
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, item):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self.positions(item))
+
+
+class BlacklistFilter:
+    """
+    A per-process bloom filter of blacklisted jtis that answers "definitely
+    not blacklisted" without a query; only possible hits go to the database.
+
+    Processes stay in sync through the cache: every blacklisting increments a
+    shared counter and stores the jti under the new value, and a process that
+    is behind replays the entries it missed. A counter that was evicted, or
+    a missing entry, makes the process rebuild its filter from the database.
+    With the default local-memory cache this only covers the current process,
+    so multi-process deployments should set ``REDIS_URL``.
+    """
+    def __init__(self):
+        self.filter = None
+        self.version = None
+        self.lock = threading.Lock()
+
+    def current_version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    def rebuild(self, version):
+        jtis = list(BlacklistedToken.objects.filter(
+            token__expires_at__gt=timezone.now(),
+        ).values_list('token__jti', flat=True))
+        self.filter = BloomFilter(max(len(jtis) * 2, settings.TOKEN_BLACKLIST_FILTER_CAPACITY))
+        for jti in jtis:
+            self.filter.add(jti)
+        self.version = version
+
+    def catch_up(self, version):
+        if self.filter is None or not 0 <= version - self.version <= MAX_CATCH_UP:
+            return False
+        keys = [f'token-blacklist:{number}' for number in range(self.version + 1, version + 1)]
+        entries = cache.get_many(keys)
+        if len(entries) != len(keys):
+            return False
+        for jti in entries.values():
+            self.filter.add(jti)
+        self.version = version
+        return True
+
+    def might_contain(self, jti):
+        version = self.current_version()
+        with self.lock:
+            if version != self.version and not self.catch_up(version):
+                self.rebuild(version)
+            return jti in self.filter
+
+    def record(self, jti):
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            # No counter to extend; every process will rebuild from the database.
+            cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+            return
+        cache.set(f'token-blacklist:{version}', jti, ENTRY_TIMEOUT)
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def prune_expired_tokens(batch_size=PRUNE_BATCH_SIZE):
+    """
+    Delete expired outstanding tokens and their blacklist entries, one short
+    transaction per batch so the tables stay writable while a large backlog
+    is cleared. Returns ``(outstanding, blacklisted)`` rows deleted.
+    """
+    now = timezone.now()
+    outstanding = blacklisted = 0
+    while True:
+        ids = list(OutstandingToken.objects.filter(expires_at__lte=now).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return outstanding, blacklisted
+        with transaction.atomic():
+            _, deleted = OutstandingToken.objects.filter(id__in=ids).delete()
+        outstanding += deleted.get(OutstandingToken._meta.label, 0)
+        blacklisted += deleted.get(BlacklistedToken._meta.label, 0)
@@ -0,0 +1,119 @@
+import json
+import logging
+import math
+import re
+import threading
+import time
+from base64 import urlsafe_b64decode
+
+import rsa
+from django.conf import settings
+from google.auth import exceptions, jwt
+from google.auth.transport.requests import Request
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+DEFAULT_MAX_AGE = 3600
+# An unknown key id triggers a refetch (Google rotated its keys), but at most this often.
+MIN_REFETCH_INTERVAL = 60
+
+
+def decode_int(value):
+    return int.from_bytes(urlsafe_b64decode(value + '=' * (-len(value) % 4)), 'big')
+
+
+def parse_jwks(data):
+    """Map each RSA key id of a JWKS document to a PEM public key ``google.auth.jwt`` can verify with."""
+    return {
+        key['kid']: rsa.PublicKey(decode_int(key['n']), decode_int(key['e'])).save_pkcs1().decode('ascii')
+        for key in data.get('keys', [])
+        if key.get('kty') == 'RSA'
+    }
+
+
+def parse_max_age(headers):
+    """Seconds the response stays fresh according to ``Cache-Control: max-age`` minus ``Age``."""
+    headers = {name.lower(): value for name, value in headers.items()}
+    match = re.search(r'max-age=(\d+)', headers.get('cache-control', ''))
+    if not match:
+        return DEFAULT_MAX_AGE
+    try:
+        age = int(headers.get('age', 0))
+    except ValueError:
+        age = 0
+    return max(int(match.group(1)) - age, 0)
+
+
+class GoogleKeyStore:
+    """
+    Google's ID-token signing keys, kept in memory until the expiry the
+    certs endpoint advertises, so a login is verified without a network
+    round trip. With ``path`` the keys are read once from a JWKS file
+    instead, which keeps tests and offline setups off the network.
+    """
+    def __init__(self, url=None, path=None, clock=time.monotonic):
+        self.url = url
+        self.path = path
+        self.clock = clock
+        self.keys = {}
+        self.expires_at = -math.inf
+        self.fetched_at = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        if self.path:
+            with open(self.path, encoding='utf-8') as f:
+                return parse_jwks(json.load(f)), math.inf
+        response = Request()(self.url, method='GET')
+        if response.status != 200:
+            raise exceptions.TransportError(f'Could not fetch certificates at {self.url}')
+        return parse_jwks(json.loads(response.data.decode('utf-8'))), parse_max_age(response.headers)
+
+    def refresh(self):
+        now = self.clock()
+        self.fetched_at = now
+        try:
+            keys, max_age = self.load()
+        except exceptions.TransportError:
+            if not self.keys:
+                raise
+            # Better to keep verifying with the last known keys than to fail every login.
+            logger.warning('Could not refresh Google signing keys; using the cached ones', exc_info=True)
+            self.expires_at = now + MIN_REFETCH_INTERVAL
+            return
+        self.keys, self.expires_at = keys, now + max_age
+
+    def get_keys(self, key_id=None):
+        with self.lock:
+            now = self.clock()
+            expired = now >= self.expires_at
+            rotated = (
+                key_id is not None and key_id not in self.keys
+                and (self.fetched_at is None or now - self.fetched_at >= MIN_REFETCH_INTERVAL)
+            )
+            if expired or rotated:
+                self.refresh()
+            return self.keys
+
+    def verify(self, token, audience):
+        """Return the claims of a Google ID token; raises ``ValueError`` when it is invalid."""
+        key_id = jwt.decode_header(token).get('kid')
+        claims = jwt.decode(token, certs=self.get_keys(key_id), audience=audience)
+        if claims.get('iss') not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+        return claims
+
+
+_key_stores = {}
+
+
+def get_key_store():
+    source = (settings.GOOGLE_JWKS_URL, settings.GOOGLE_JWKS_FILE)
+    if source not in _key_stores:
+        _key_stores[source] = GoogleKeyStore(*source)
+    return _key_stores[source]
+
+
+def verify_id_token(token):
+    return get_key_store().verify(token, settings.GOOGLE_CLIENT_ID)
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+MAX_ATTEMPTS = getattr(settings, 'EMAIL_QUEUE_MAX_ATTEMPTS', 5)
+RETRY_DELAY = getattr(settings, 'EMAIL_QUEUE_RETRY_DELAY', timedelta(minutes=1))
+BATCH_SIZE = getattr(settings, 'EMAIL_QUEUE_BATCH_SIZE', 50)
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """Store a message in the outbox; same arguments as ``send_mail``."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or '',
+        recipients=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: RETRY_DELAY, then twice that, four times, ..."""
+    return RETRY_DELAY * (2 ** (attempts - 1))
+
+
+def claim_due_mail(batch_size=BATCH_SIZE):
+    """
+    Take up to ``batch_size`` due outbox rows for this worker and commit.
+
+    The attempt is counted and ``next_attempt_at`` moved out by the backoff
+    up front, so other workers skip the rows without a lock being held
+    during delivery, and rows of a worker that dies mid-batch come due again
+    instead of staying stuck.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for email in emails:
+            email.attempts += 1
+            email.next_attempt_at = now + retry_delay(email.attempts)
+        OutgoingEmail.objects.bulk_update(emails, ['attempts', 'next_attempt_at'])
+    return emails
+
+
+def record_failure(email, error, max_attempts):
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = OutgoingEmail.STATUS_FAILED
+
+
+def send_queued_mail(batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    """
+    Deliver due outbox rows over a single backend connection.
+
+    Returns ``(sent, failed)`` counts for this batch. A failed message,
+    including every message of a batch whose connection could not be
+    opened, is retried with backoff until it has used up ``max_attempts``.
+    """
+    sent = failed = 0
+    emails = claim_due_mail(batch_size)
+    if not emails:
+        return sent, failed
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            record_failure(email, e, max_attempts)
+        failed = len(emails)
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject,
+                    email.body,
+                    email.from_email or settings.DEFAULT_FROM_EMAIL,
+                    email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as e:
+                    failed += 1
+                    record_failure(email, e, max_attempts)
+                else:
+                    sent += 1
+                    email.status = OutgoingEmail.STATUS_SENT
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+        finally:
+            connection.close()
+
+    OutgoingEmail.objects.bulk_update(emails, ['status', 'last_error', 'sent_at'])
+    return sent, failed
@@ -0,0 +1,71 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from account.authentication import ClaimsJWTAuthentication
+from account.models import CustomUser
+from account.tokens import UserRefreshToken
+
+
+class StatelessView:
+    stateless_auth = True
+
+
+class StatefulView:
+    stateless_auth = False
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare queries and time per authenticated request between plain '
+        'JWTAuthentication and ClaimsJWTAuthentication. Nothing is kept in the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = CustomUser.objects.create_user(
+                    username='benchmark-auth', email='benchmark-auth@example.com',
+                    password='benchmark-password', is_email_verified=True,
+                )
+                token = str(UserRefreshToken.for_user(user).access_token)
+                cases = [
+                    ('JWTAuthentication', JWTAuthentication(), 'get', StatefulView()),
+                    ('claims (GET, stateless view)', ClaimsJWTAuthentication(), 'get', StatelessView()),
+                    ('claims (POST, cached user)', ClaimsJWTAuthentication(), 'post', StatelessView()),
+                ]
+                for name, authenticator, method, view in cases:
+                    self.report(name, *self.measure(authenticator, method, view, token, options['requests']))
+                cache.delete(f'auth-user:{user.pk}')
+                raise Rollback
+        except Rollback:
+            pass
+
+    def measure(self, authenticator, method, view, token, count):
+        factory = APIRequestFactory()
+        requests = [
+            Request(getattr(factory, method)('/', HTTP_AUTHORIZATION=f'Bearer {token}'), parser_context={'view': view})
+            for _ in range(count)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for request in requests:
+                authenticator.authenticate(request)
+            elapsed = time.perf_counter() - started
+        return len(queries) / count, elapsed / count * 1_000_000
+
+    def report(self, name, queries, microseconds):
+        self.stdout.write(f'{name:<32} {queries:6.2f} queries/request {microseconds:9.1f} us/request')
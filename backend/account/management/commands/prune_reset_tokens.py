@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from account.models import PasswordResetToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired password reset tokens in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = 0
+        while True:
+            # Served by the expires_at index; each batch commits on its own.
+            ids = list(PasswordResetToken.objects.expired().order_by('expires_at').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                deleted += PasswordResetToken.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(f'Deleted {deleted} expired password reset token(s).')
@@ -0,0 +1,38 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from account.mail import BATCH_SIZE, MAX_ATTEMPTS, send_queued_mail
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outgoing emails, retrying failures with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox instead of exiting.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between empty polls.')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = send_queued_mail(options['batch_size'], options['max_attempts'])
+            except Exception:
+                if not options['loop']:
+                    raise
+                # A lost database connection, say; drop it and poll again after the interval.
+                logger.exception('Could not deliver queued mail')
+                close_old_connections()
+                time.sleep(options['interval'])
+                continue
+            if sent or failed:
+                self.stdout.write(f'Sent {sent} email(s), {failed} failed.')
+            if not options['loop']:
+                break
+            if sent + failed < options['batch_size']:
+                time.sleep(options['interval'])
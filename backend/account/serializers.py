@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from .models import CustomUser, PasswordResetToken
+from .tokens import UserRefreshToken
 
 class CustomUserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -85,4 +87,7 @@ class ChangePasswordSerializer(serializers.Serializer):
 
 class ChangeUsernameSerializer(serializers.Serializer):
     new_username = serializers.CharField(required=True, min_length=3, max_length=150)
-    password = serializers.CharField(required=True)
\ No newline at end of file
+    password = serializers.CharField(required=True)
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = UserRefreshToken
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import user_cache_key
+from .blacklist import blacklist_filter
+from .models import CustomUser
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def drop_cached_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def record_blacklisted_token(sender, instance, created, **kwargs):
+    if created and settings.TOKEN_BLACKLIST_FILTER:
+        jti = instance.token.jti
+        transaction.on_commit(lambda: blacklist_filter.record(jti))
@@ -1,3 +1,355 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+import rsa
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from google.auth import crypt, jwt
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import user_cache_key
+from .blacklist import BloomFilter, blacklist_filter
+from .google import GoogleKeyStore, parse_max_age
+from .mail import queue_mail, send_queued_mail
+from .models import CustomUser, OutgoingEmail, PasswordResetToken
+from .tokens import UserRefreshToken
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP unavailable')
+
+
+class UnreachableEmailBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('SMTP server down')
+
+    def send_messages(self, email_messages):
+        raise AssertionError('send_messages() without a connection')
+
+
+class EmailQueueTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_registration_queues_verification_email(self):
+        response = self.client.post('/account/register/', {
+            'username': 'reader', 'email': 'reader@example.com',
+            'password1': 'long-password', 'password2': 'long-password',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutgoingEmail.objects.get()
+        self.assertEqual(queued.recipients, ['reader@example.com'])
+
+        self.assertEqual(send_queued_mail(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Verify your email')
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutgoingEmail.STATUS_SENT)
+
+    def test_password_reset_queues_email(self):
+        CustomUser.objects.create_user(username='reader', email='reader@example.com', password='long-password')
+        response = self.client.post('/account/password/reset/', {'email': 'reader@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(OutgoingEmail.objects.get().subject, 'Reset your password')
+
+    def test_batch_is_sent_once(self):
+        for i in range(3):
+            queue_mail('Hello', 'Body', None, [f'user{i}@example.com'])
+        self.assertEqual(send_queued_mail(), (3, 0))
+        self.assertEqual(send_queued_mail(), (0, 0))
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(EMAIL_BACKEND='account.tests.FailingEmailBackend')
+    def test_failures_back_off_then_give_up(self):
+        email = queue_mail('Hello', 'Body', None, ['user@example.com'])
+        self.assertEqual(send_queued_mail(max_attempts=2), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.STATUS_PENDING)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(email.last_error, 'SMTP unavailable')
+
+        # Not due yet.
+        self.assertEqual(send_queued_mail(max_attempts=2), (0, 0))
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(send_queued_mail(max_attempts=2), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.STATUS_FAILED)
+        self.assertEqual(email.attempts, 2)
+
+    @override_settings(EMAIL_BACKEND='account.tests.UnreachableEmailBackend')
+    def test_unreachable_server_reschedules_batch(self):
+        for i in range(2):
+            queue_mail('Hello', 'Body', None, [f'user{i}@example.com'])
+        self.assertEqual(send_queued_mail(), (0, 2))
+        for email in OutgoingEmail.objects.all():
+            self.assertEqual(email.status, OutgoingEmail.STATUS_PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertEqual(email.last_error, 'SMTP server down')
+            self.assertGreater(email.next_attempt_at, timezone.now())
+        # Backing off: nothing is due until the retry delay has passed.
+        self.assertEqual(send_queued_mail(), (0, 0))
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='reader', email='reader@example.com', password='long-password', is_email_verified=True,
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {UserRefreshToken.for_user(self.user).access_token}')
+
+    def test_login_embeds_user_claims(self):
+        response = APIClient().post('/account/login/', {'email': 'reader@example.com', 'password': 'long-password'})
+        self.assertEqual(response.status_code, 200)
+        token = UserRefreshToken(response.data['refresh']).access_token
+        self.assertEqual(token['username'], 'reader')
+        self.assertEqual(token['role'], self.user.role)
+        self.assertIs(token['is_email_verified'], True)
+        self.assertIs(token['is_staff'], False)
+
+    def test_safe_request_to_stateless_view_skips_user_query(self):
+        # Only the tag list itself.
+        with self.assertNumQueries(1):
+            response = self.client.get('/articles/tags/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_requests_load_user_once(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/account/userinfo/')
+        self.assertEqual(response.data['username'], 'reader')
+        # The role check is answered from the cache; only the fields the
+        # response shows are loaded.
+        with self.assertNumQueries(2):
+            response = self.client.get('/account/userinfo/')
+        self.assertEqual((response.data['username'], response.data['email']), ('reader', 'reader@example.com'))
+
+    def test_cache_holds_no_credentials(self):
+        self.client.get('/account/userinfo/')
+        self.assertEqual(cache.get(user_cache_key(self.user.pk)), {
+            'id': self.user.pk, 'is_active': True, 'is_staff': False, 'role': 'blogger', 'is_email_verified': True,
+        })
+
+    def test_saving_user_drops_cached_copy(self):
+        self.client.get('/account/userinfo/')
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(self.client.get('/account/userinfo/').data['username'], 'renamed')
+
+    def test_admin_actions_do_not_trust_staff_claim(self):
+        self.user.is_staff = True
+        self.user.save()
+        token = UserRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get('/articles/articles/export/').status_code, 200)
+        self.user.is_staff = False
+        self.user.save()
+        self.assertIs(token['is_staff'], True)
+        self.assertEqual(self.client.get('/articles/articles/export/').status_code, 403)
+        self.user.is_staff, self.user.is_active = True, False
+        self.user.save()
+        self.assertEqual(self.client.get('/articles/articles/export/').status_code, 401)
+
+    def test_token_without_claims_falls_back_to_database(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        with self.assertNumQueries(2):
+            self.client.get('/articles/tags/')
+
+
+def encode_int(value):
+    return urlsafe_b64encode(value.to_bytes((value.bit_length() + 7) // 8, 'big')).rstrip(b'=').decode('ascii')
+
+
+@override_settings(GOOGLE_CLIENT_ID='test-client')
+class GoogleLoginTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        public, private = rsa.newkeys(1024)
+        cls.signer = crypt.RSASigner.from_string(private.save_pkcs1(), key_id='test-key')
+        directory = tempfile.mkdtemp()
+        cls.jwks_file = os.path.join(directory, 'jwks.json')
+        with open(cls.jwks_file, 'w') as f:
+            json.dump({'keys': [{'kty': 'RSA', 'kid': 'test-key', 'n': encode_int(public.n), 'e': encode_int(public.e)}]}, f)
+        cls.addClassCleanup(os.remove, cls.jwks_file)
+
+    def setUp(self):
+        self.client = APIClient()
+        override = override_settings(GOOGLE_JWKS_FILE=self.jwks_file)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_token(self, **claims):
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com', 'aud': 'test-client', 'iat': now, 'exp': now + 600,
+            'email': 'google@example.com', 'name': 'googler', **claims,
+        }
+        return jwt.encode(self.signer, payload).decode('ascii')
+
+    def test_new_user_is_created_verified_in_one_insert(self):
+        # SELECT, the INSERT inside a savepoint with no follow-up UPDATE, then the outstanding token.
+        with self.assertNumQueries(5):
+            response = self.client.post('/account/google-login/', {'token': self.make_token()})
+        self.assertEqual(response.status_code, 200)
+        user = CustomUser.objects.get(email='google@example.com')
+        self.assertEqual(user.username, 'googler')
+        self.assertTrue(user.is_email_verified)
+
+    def test_existing_user_logs_in(self):
+        CustomUser.objects.create_user(username='existing', email='google@example.com', password='long-password')
+        response = self.client.post('/account/google-login/', {'token': self.make_token()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(CustomUser.objects.get().username, 'existing')
+
+    def test_rejects_invalid_tokens(self):
+        for token in [
+            self.make_token(aud='someone-else'),
+            self.make_token(iss='https://evil.example.com'),
+            self.make_token(exp=int(time.time()) - 3600),
+            'not-a-token',
+        ]:
+            response = self.client.post('/account/google-login/', {'token': token})
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(CustomUser.objects.exists())
+
+
+class StubKeyStore(GoogleKeyStore):
+    def __init__(self):
+        self.now = 0
+        super().__init__(url='https://example.com/certs', clock=lambda: self.now)
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return {f'key-{self.loads}': 'pem'}, 300
+
+
+class GoogleKeyStoreTests(TestCase):
+    def test_keys_are_reused_until_they_expire(self):
+        store = StubKeyStore()
+        store.get_keys('key-1')
+        store.now = 299
+        self.assertEqual(store.get_keys('key-1'), {'key-1': 'pem'})
+        self.assertEqual(store.loads, 1)
+        store.now = 300
+        store.get_keys()
+        self.assertEqual(store.loads, 2)
+
+    def test_unknown_key_refetches_at_most_once_a_minute(self):
+        store = StubKeyStore()
+        store.get_keys('key-1')
+        store.get_keys('rotated')
+        self.assertEqual(store.loads, 1)
+        store.now = 60
+        store.get_keys('rotated')
+        self.assertEqual(store.loads, 2)
+
+    def test_max_age_honours_age_header(self):
+        self.assertEqual(parse_max_age({'Cache-Control': 'public, max-age=20000, must-revalidate', 'Age': '500'}), 19500)
+        self.assertEqual(parse_max_age({}), 3600)
+
+
+class TokenBlacklistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='reader', email='reader@example.com', password='long-password')
+        self.refresh = str(UserRefreshToken.for_user(self.user))
+
+    def refresh_token(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/account/token/refresh/', {'refresh': token})
+
+    def test_rotated_token_cannot_be_reused(self):
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], self.refresh)
+        self.assertEqual(self.refresh_token(self.refresh).status_code, 401)
+        self.assertEqual(self.refresh_token(response.data['refresh']).status_code, 200)
+
+    def test_logout_blacklists_refresh_token(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/account/logout/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, 205)
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=UserRefreshToken(self.refresh, verify=False)['jti']).exists())
+
+    def test_prune_deletes_only_expired_tokens(self):
+        for i in range(5):
+            token = OutstandingToken.objects.create(jti=f'expired-{i}', token='', expires_at=timezone.now() - timedelta(hours=1))
+            if i % 2:
+                BlacklistedToken.objects.create(token=token)
+        out = StringIO()
+        call_command('prune_tokens', batch_size=2, stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Deleted 5 outstanding and 2 blacklisted token(s).')
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+
+    @override_settings(TOKEN_BLACKLIST_FILTER=True)
+    def test_bloom_filter_skips_lookup_for_clean_tokens(self):
+        blacklisted = self.refresh_token(self.refresh)
+        self.assertEqual(blacklisted.status_code, 200)
+        fresh = str(UserRefreshToken.for_user(self.user))
+        blacklist_filter.might_contain('warm-up')
+        with self.assertNumQueries(0):
+            UserRefreshToken(fresh)
+        self.assertEqual(self.refresh_token(self.refresh).status_code, 401)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+        self.assertTrue(all(f'jti-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 50)
+
+
+class PasswordResetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='reader', email='reader@example.com', password='long-password')
+
+    def create_token(self, hours=1):
+        return PasswordResetToken.objects.create(user=self.user, expires_at=timezone.now() + timedelta(hours=hours))
+
+    def test_reset_consumes_token(self):
+        token = self.create_token()
+        # savepoint, SELECT token + user, DELETE, UPDATE password, release
+        with self.assertNumQueries(5):
+            response = self.client.post(f'/account/password/reset/confirm/{token.token}/', {'password': 'new-long-password'})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new-long-password'))
+        response = self.client.post(f'/account/password/reset/confirm/{token.token}/', {'password': 'other-long-password'})
+        self.assertEqual(response.data, {'error': 'The reset link is invalid'})
+
+    def test_expired_token_is_rejected_and_removed(self):
+        token = self.create_token(hours=-1)
+        response = self.client.post(f'/account/password/reset/confirm/{token.token}/', {'password': 'new-long-password'})
+        self.assertEqual(response.data, {'error': 'The reset link has expired'})
+        self.assertFalse(PasswordResetToken.objects.exists())
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('long-password'))
+
+    def test_prune_deletes_only_expired_tokens(self):
+        for _ in range(3):
+            self.create_token(hours=-1)
+        live = self.create_token()
+        out = StringIO()
+        call_command('prune_reset_tokens', batch_size=2, stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Deleted 3 expired password reset token(s).')
+        self.assertEqual(list(PasswordResetToken.objects.all()), [live])
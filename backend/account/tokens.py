@@ -0,0 +1,24 @@
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import blacklist_filter
+
+# Copied into every token so read-only endpoints can authenticate from the
+# token alone (see account.authentication.ClaimsJWTAuthentication).
+USER_CLAIMS = ('username', 'role', 'is_email_verified', 'is_staff')
+
+
+class UserRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+    def check_blacklist(self):
+        # Only tokens the bloom filter can't rule out cost a query.
+        if settings.TOKEN_BLACKLIST_FILTER and not blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            return
+        super().check_blacklist()
@@ -1,4 +1,5 @@
 from django.urls import path
+from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     UserRegistrationAPIView,
     UserLoginAPIView,
@@ -16,6 +17,7 @@ urlpatterns = [
     path('register/', UserRegistrationAPIView.as_view(), name='user_registration'),
     path('login/', UserLoginAPIView.as_view(), name='user_login'),
     path('logout/', UserLogoutAPIView.as_view(), name='logout'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('userinfo/', UserInfoAPIView.as_view(), name='userinfo'),
     path('password/reset/', RequestPasswordResetEmail.as_view(), name='password_reset_request'),
     path('password/reset/confirm/<str:token>/', SetNewPasswordAPIView.as_view(), name='password_reset_confirm'),
@@ -1,12 +1,11 @@
 from django.shortcuts import get_object_or_404
 from rest_framework.generics import GenericAPIView, RetrieveAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import PermissionDenied, ValidationError
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from rest_framework.views import APIView
 from .serializers import (
     EmailVerificationSerializer,
@@ -17,13 +16,15 @@ from .serializers import (
     CustomUserSerializer,ChangePasswordSerializer, ChangeUsernameSerializer
 )
 from .models import CustomUser, PasswordResetToken
+from .google import verify_id_token
+from .mail import queue_mail
+from .tokens import UserRefreshToken
 from datetime import timedelta
 from django.utils import timezone
 import uuid
 import os
 from dotenv import load_dotenv
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from google.auth.exceptions import TransportError
 
 load_dotenv()
 
@@ -31,17 +32,17 @@ class UserRegistrationAPIView(APIView):
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-
-            # Send verification email
-            verification_link = f"{os.getenv('FRONTEND_URL')}verifyEmail/{user.email_verification_token}/"
-            send_mail(
-                'Verify your email',
-                f'Please click the following link to verify your email and activate your account: {verification_link}',
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=False,
-            )
+            with transaction.atomic():
+                user = serializer.save()
+
+                # Queue verification email
+                verification_link = f"{os.getenv('FRONTEND_URL')}verifyEmail/{user.email_verification_token}/"
+                queue_mail(
+                    'Verify your email',
+                    f'Please click the following link to verify your email and activate your account: {verification_link}',
+                    settings.DEFAULT_FROM_EMAIL,
+                    [user.email],
+                )
 
             return Response({"success": "User registered. Please check your email to verify your account."}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -66,7 +67,7 @@ class UserLoginAPIView(APIView):
         try:
             serializer.is_valid(raise_exception=True)
             user = serializer.validated_data
-            refresh = RefreshToken.for_user(user)
+            refresh = UserRefreshToken.for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -88,7 +89,7 @@ class UserLogoutAPIView(GenericAPIView):
             if not refresh_token:
                 return Response({"error": "Refresh token is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-            token = RefreshToken(refresh_token)
+            token = UserRefreshToken(refresh_token)
             token.blacklist()
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
@@ -110,28 +111,28 @@ class RequestPasswordResetEmail(APIView):
         if serializer.is_valid():
             email = serializer.validated_data['email']
             try:
-                user = CustomUser.objects.get(email=email)
-                
-                # Delete any existing tokens for this user
-                PasswordResetToken.objects.filter(user=user).delete()
-                
-                # Create a new token
-                expiration_time = timezone.now() + timedelta(hours=1)  # Token expires in 1 hour
-                reset_token = PasswordResetToken.objects.create(
-                    user=user,
-                    token=uuid.uuid4(),
-                    expires_at=expiration_time
-                )
-                
-                reset_url = f"{os.getenv('FRONTEND_URL')}resetPasswod/{reset_token.token}/"
-                
-                send_mail(
-                    'Reset your password',
-                    f'Use this link to reset your password: {reset_url}\nThis link will expire in 1 hour.',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [email],
-                    fail_silently=False,
-                )
+                user = CustomUser.objects.only('id').get(email=email)
+
+                with transaction.atomic():
+                    # Delete any existing tokens for this user
+                    PasswordResetToken.objects.filter(user=user).delete()
+
+                    # Create a new token
+                    expiration_time = timezone.now() + timedelta(hours=1)  # Token expires in 1 hour
+                    reset_token = PasswordResetToken.objects.create(
+                        user=user,
+                        token=uuid.uuid4(),
+                        expires_at=expiration_time
+                    )
+
+                    reset_url = f"{os.getenv('FRONTEND_URL')}resetPasswod/{reset_token.token}/"
+
+                    queue_mail(
+                        'Reset your password',
+                        f'Use this link to reset your password: {reset_url}\nThis link will expire in 1 hour.',
+                        settings.DEFAULT_FROM_EMAIL,
+                        [email],
+                    )
                 
                 return Response({"success": "Password reset email has been sent."}, status=status.HTTP_200_OK)
             except CustomUser.DoesNotExist:
@@ -143,16 +144,19 @@ class SetNewPasswordAPIView(APIView):
         serializer = SetNewPasswordSerializer(data=request.data)
         if serializer.is_valid():
             try:
-                reset_token = PasswordResetToken.objects.get(token=token)
-                if not reset_token.is_valid():
-                    return Response({"error": "The reset link has expired"}, status=status.HTTP_400_BAD_REQUEST)
-                
-                user = reset_token.user
-                user.set_password(serializer.validated_data['password'])
-                user.save()
+                with transaction.atomic():
+                    reset_token = PasswordResetToken.objects.select_related('user').select_for_update().get(token=token)
+
+                    # Consume the token; a concurrent request that already deleted it gets nothing.
+                    deleted, _ = PasswordResetToken.objects.filter(pk=reset_token.pk).delete()
+                    if not deleted:
+                        raise PasswordResetToken.DoesNotExist
+                    if not reset_token.is_valid():
+                        return Response({"error": "The reset link has expired"}, status=status.HTTP_400_BAD_REQUEST)
 
-                # Delete the used token
-                reset_token.delete()
+                    user = reset_token.user
+                    user.set_password(serializer.validated_data['password'])
+                    user.save(update_fields=['password'])
 
                 return Response({"success": "Password has been reset successfully."}, status=status.HTTP_200_OK)
             except PasswordResetToken.DoesNotExist:
@@ -195,27 +199,28 @@ class GoogleLoginView(APIView):
     def post(self, request):
         token = request.data.get('token')
         try:
-            # Verify the token
-            idinfo = id_token.verify_oauth2_token(token, requests.Request(), settings.GOOGLE_CLIENT_ID)
+            # Verify the token against the cached Google signing keys
+            idinfo = verify_id_token(token)
 
             # Get user info
             email = idinfo['email']
             name = idinfo.get('name', '')
 
             # Check if user exists, if not create a new one
-            user, created = CustomUser.objects.get_or_create(email=email)
-            if created:
-                user.username = name
-                user.is_active = True
-                user.is_email_verified = True
-                user.save()
+            user, created = CustomUser.objects.get_or_create(email=email, defaults={
+                'username': name,
+                'is_active': True,
+                'is_email_verified': True,
+            })
 
             # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = UserRefreshToken.for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
             }, status=status.HTTP_200_OK)
 
         except ValueError:
-            return Response({'error': 'Invalid token'}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            return Response({'error': 'Invalid token'}, status=status.HTTP_400_BAD_REQUEST)
+        except TransportError:
+            return Response({'error': 'Could not verify token'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 
 class ArticleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'article'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .throttles import parse_rate
+
+        try:
+            parse_rate(settings.COMMENT_RATE_LIMIT)
+        except ValueError as e:
+            raise ImproperlyConfigured(f'COMMENT_RATE_LIMIT: {e}')
@@ -0,0 +1,115 @@
+"""
+Async variants of the public article, category and tag reads, for ASGI.
+
+Each view awaits every query up front (rows, ``select_related`` joins and
+prefetches are loaded by the same awaited evaluation), so the serializers
+that follow only walk objects already in memory and never block the event
+loop on the database. Filtering, ordering and keyset pagination are reused
+from ``ArticleViewSet`` so both paths answer the same query strings.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.request import Request
+
+from .languages import get_language_chain
+from .models import Article, Category, Tag
+from .pagination import KeysetPagination
+from .serializers import ArticleListSerializer, ArticleSerializer, CategorySerializer, TagSerializer
+from .views import ArticleViewSet
+
+# ArticleFilter validates these against the database, which needs a sync thread.
+DATABASE_FILTER_PARAMS = ('category', 'tags')
+
+
+def render(data, status=200):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data), status=status, content_type=JSONRenderer.media_type)
+
+
+def safe_only(view):
+    """``require_safe`` for coroutine views; Django 4.2's decorators would turn them into sync views."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def not_found(detail='Not found.'):
+    return render({'detail': str(detail)}, status=404)
+
+
+@safe_only
+async def category_list(request):
+    categories = [category async for category in Category.objects.all()]
+    return render(CategorySerializer(categories, many=True).data)
+
+
+@safe_only
+async def category_detail(request, pk):
+    try:
+        category = await Category.objects.aget(pk=pk)
+    except Category.DoesNotExist:
+        return not_found()
+    return render(CategorySerializer(category).data)
+
+
+@safe_only
+async def tag_list(request):
+    tags = [tag async for tag in Tag.objects.all()]
+    return render(TagSerializer(tags, many=True).data)
+
+
+@safe_only
+async def tag_detail(request, pk):
+    try:
+        tag = await Tag.objects.aget(pk=pk)
+    except Tag.DoesNotExist:
+        return not_found()
+    return render(TagSerializer(tag).data)
+
+
+@safe_only
+async def article_list(request):
+    request = Request(request)
+    view = ArticleViewSet(request=request, action='list', args=(), kwargs={}, format_kwarg=None)
+    languages = get_language_chain(request) or [settings.ARTICLE_DEFAULT_LANGUAGE]
+    queryset = Article.objects.for_list(languages=languages)
+    if any(param in request.query_params for param in DATABASE_FILTER_PARAMS):
+        queryset = await sync_to_async(view.filter_queryset)(queryset)
+    else:
+        queryset = view.filter_queryset(queryset)
+
+    paginator = KeysetPagination()
+    try:
+        page = paginator.get_page_queryset(queryset, request, view)
+    except NotFound as e:
+        return not_found(e.detail)
+    paginator.set_page([article async for article in page])
+    serializer = ArticleListSerializer(paginator.page, many=True, context={'request': request, 'languages': languages})
+    response = render(paginator.get_paginated_data(serializer.data))
+    patch_vary_headers(response, ['Accept-Language'])
+    return response
+
+
+@safe_only
+async def article_detail(request, pk):
+    request = Request(request)
+    queryset = Article.objects.with_related(
+        comments_limit=settings.ARTICLE_INLINE_COMMENTS, languages=get_language_chain(request),
+    )
+    try:
+        article = await queryset.aget(pk=pk)
+    except Article.DoesNotExist:
+        return not_found()
+    response = render(ArticleSerializer(article, context={'request': request}).data)
+    patch_vary_headers(response, ['Accept-Language'])
+    return response
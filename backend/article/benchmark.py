@@ -0,0 +1,317 @@
+"""
+Seed data and a request driver for ``manage.py benchmark_api``.
+
+Every route of ``account.urls`` and ``article.urls`` is described by a
+``Scenario``; ``run_benchmark`` replays each one through the test client
+and reports latency percentiles, queries per request and response sizes.
+"""
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from base64 import urlsafe_b64encode
+from collections import Counter
+from datetime import timedelta
+
+import rsa
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from google.auth import crypt, jwt
+from rest_framework.test import APIClient
+
+from account.models import CustomUser, PasswordResetToken
+from account.tokens import UserRefreshToken
+
+from .cache import get_cache
+from .counters import reconcile
+from .models import Article, ArticleContent, Category, Comment, Tag
+from .search import get_search_backend
+from .snapshots import refresh as refresh_snapshots
+
+PASSWORD = 'benchmark-password'
+WORDS = (
+    'django query index cache token latency article comment language search '
+    'keyset cursor thread render payload python server client network'
+).split()
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def seed(users=50, articles=500, comments=2000, tags=30, categories=10, languages=('en', 'fr', 'ar'), random_seed=42):
+    """
+    Bulk-insert a reproducible data set and return the ids that were created.
+    Every article has an ``en`` translation plus a random subset of the
+    other ``languages``, a category and up to five tags.
+    """
+    rng = random.Random(random_seed)
+    password = make_password(PASSWORD)
+    with transaction.atomic():
+        user_objects = CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f'bench-{i}', email=f'bench-{i}@example.com', password=password,
+                is_email_verified=True, is_staff=i == 0,
+            )
+            for i in range(users)
+        ])
+        category_objects = Category.objects.bulk_create([Category(name=f'Category {i}') for i in range(categories)])
+        tag_objects = Tag.objects.bulk_create([Tag(name=f'tag-{i}') for i in range(tags)])
+        article_objects = Article.objects.bulk_create([
+            Article(author=rng.choice(user_objects), category=rng.choice(category_objects) if category_objects else None)
+            for _ in range(articles)
+        ])
+        contents = ArticleContent.objects.bulk_create([
+            ArticleContent(article=article, language=language, title=sentence(rng, 6), body=sentence(rng, 120))
+            for article in article_objects
+            for language in [languages[0]] + [other for other in languages[1:] if rng.random() < 0.5]
+        ])
+        Article.tags.through.objects.bulk_create([
+            Article.tags.through(article_id=article.pk, tag_id=tag.pk)
+            for article in article_objects
+            for tag in rng.sample(tag_objects, min(len(tag_objects), rng.randint(0, 5)))
+        ])
+        comment_objects = Comment.objects.bulk_create([
+            Comment(article=rng.choice(article_objects), user=rng.choice(user_objects), content=sentence(rng, 20))
+            for _ in range(comments if article_objects else 0)
+        ])
+        get_search_backend().index(contents)
+        reconcile()
+        refresh_snapshots([article.pk for article in article_objects])
+    get_cache().clear()
+    return {
+        'users': [user.pk for user in user_objects],
+        'categories': [category.pk for category in category_objects],
+        'tags': [tag.pk for tag in tag_objects],
+        'articles': [article.pk for article in article_objects],
+        'comments': [comment.pk for comment in comment_objects],
+    }
+
+
+class Scenario:
+    """
+    One route under test. ``prepare(count)`` runs before the clock starts and
+    returns ``count`` ``(path, data)`` pairs, one per request, so endpoints
+    that consume state (tokens, one-time links) get a fresh input each time.
+    """
+    def __init__(self, name, method, prepare, user=None, format='json', headers=None):
+        self.name = name
+        self.method = method
+        self.prepare = prepare
+        self.user = user
+        self.format = format
+        self.headers = headers or {}
+
+
+def repeat(path, data=None):
+    return lambda count: [(path, data)] * count
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+class GoogleFixture:
+    """A throwaway signing key and JWKS file so Google login can be driven offline."""
+    client_id = 'benchmark-client'
+
+    def __init__(self):
+        public, private = rsa.newkeys(1024)
+        self.signer = crypt.RSASigner.from_string(private.save_pkcs1(), key_id='benchmark')
+        fd, self.path = tempfile.mkstemp(suffix='.json')
+        key = {'kty': 'RSA', 'kid': 'benchmark', 'n': self.encode(public.n), 'e': self.encode(public.e)}
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'keys': [key]}, f)
+
+    @staticmethod
+    def encode(value):
+        return urlsafe_b64encode(value.to_bytes((value.bit_length() + 7) // 8, 'big')).rstrip(b'=').decode('ascii')
+
+    def token(self, email):
+        now = int(time.time())
+        return jwt.encode(self.signer, {
+            'iss': 'https://accounts.google.com', 'aud': self.client_id, 'iat': now, 'exp': now + 3600,
+            'email': email, 'name': email.split('@')[0],
+        }).decode('ascii')
+
+    def settings(self):
+        return override_settings(GOOGLE_CLIENT_ID=self.client_id, GOOGLE_JWKS_FILE=self.path)
+
+    def close(self):
+        os.remove(self.path)
+
+
+def get_scenarios(data, google):
+    user = CustomUser.objects.get(pk=data['users'][-1])
+    staff = CustomUser.objects.get(pk=data['users'][0])
+    article, category, tag = data['articles'][0], data['categories'][0], data['tags'][0]
+    comment = data['comments'][0]
+    content = ArticleContent.objects.filter(article_id=article).values_list('pk', flat=True).first()
+
+    def unique():
+        return uuid.uuid4().hex[:12]
+
+    def register(count):
+        names = [unique() for _ in range(count)]
+        return [('/account/register/', {
+            'username': name, 'email': f'{name}@example.com', 'password1': PASSWORD, 'password2': PASSWORD,
+        }) for name in names]
+
+    def verify_email(count):
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'unverified-{unique()}', email=f'{unique()}@example.com', is_active=False)
+            for _ in range(count)
+        ])
+        return [(f'/account/verifyEmail/{user.email_verification_token}/', None) for user in users]
+
+    def refresh_tokens(path):
+        return lambda count: [(path, {'refresh': str(UserRefreshToken.for_user(user))}) for _ in range(count)]
+
+    def reset_confirm(count):
+        expires_at = timezone.now() + timedelta(hours=1)
+        tokens = PasswordResetToken.objects.bulk_create([
+            PasswordResetToken(user=user, token=uuid.uuid4(), expires_at=expires_at) for _ in range(count)
+        ])
+        return [(f'/account/password/reset/confirm/{token.token}/', {'password': PASSWORD}) for token in tokens]
+
+    def change_username(count):
+        return [('/account/change-username/', {'new_username': f'renamed-{unique()}', 'password': PASSWORD}) for _ in range(count)]
+
+    def google_login(count):
+        return [('/account/google-login/', {'token': google.token(f'google-{unique()}@example.com')}) for _ in range(count)]
+
+    def new_article(count):
+        return [('/articles/articles/', {
+            'category': category, 'tags': [tag],
+            'contents': [{'language': 'en', 'title': 'Benchmark', 'body': 'Benchmark body.'}],
+        })] * count
+
+    def delete_article(count):
+        articles = Article.objects.bulk_create([Article(author=user, category_id=category) for _ in range(count)])
+        return [(f'/articles/articles/{article.pk}/', None) for article in articles]
+
+    def import_articles(count):
+        line = json.dumps({'category': category, 'tags': [tag], 'contents': [{'language': 'en', 'title': 'Imported', 'body': 'Body'}]})
+        return [('/articles/articles/import/', '\n'.join([line] * 10))] * count
+
+    return [
+        Scenario('account: register', 'post', register),
+        Scenario('account: verify email', 'get', verify_email),
+        Scenario('account: login', 'post', repeat('/account/login/', {'email': user.email, 'password': PASSWORD})),
+        Scenario('account: refresh token', 'post', refresh_tokens('/account/token/refresh/')),
+        Scenario('account: logout', 'post', refresh_tokens('/account/logout/'), user=user),
+        Scenario('account: userinfo', 'get', repeat('/account/userinfo/'), user=user),
+        Scenario('account: password reset request', 'post', repeat('/account/password/reset/', {'email': user.email})),
+        Scenario('account: password reset confirm', 'post', reset_confirm),
+        Scenario('account: change password', 'post', repeat(
+            '/account/change-password/', {'old_password': PASSWORD, 'new_password': PASSWORD},
+        ), user=user),
+        Scenario('account: change username', 'post', change_username, user=user),
+        Scenario('account: google login', 'post', google_login),
+        Scenario('articles: category list', 'get', repeat('/articles/categories/')),
+        Scenario('articles: category detail', 'get', repeat(f'/articles/categories/{category}/')),
+        Scenario('articles: tag list', 'get', repeat('/articles/tags/')),
+        Scenario('articles: tag detail', 'get', repeat(f'/articles/tags/{tag}/')),
+        Scenario('articles: article list', 'get', repeat('/articles/articles/')),
+        Scenario('articles: article list (authenticated)', 'get', repeat('/articles/articles/'), user=user),
+        Scenario('articles: article list ?lang=fr', 'get', repeat('/articles/articles/', {'lang': 'fr'})),
+        Scenario('articles: article search', 'get', repeat('/articles/articles/', {'search': 'cache latency'})),
+        Scenario('articles: article list ?ordering=updated_at', 'get', repeat('/articles/articles/', {'ordering': 'updated_at'})),
+        Scenario('articles: article detail', 'get', repeat(f'/articles/articles/{article}/')),
+        Scenario('articles: article detail (Accept-Language: fr)', 'get', repeat(f'/articles/articles/{article}/'), headers={'HTTP_ACCEPT_LANGUAGE': 'fr'}),
+        Scenario('articles: article comments', 'get', repeat(f'/articles/articles/{article}/comments/')),
+        Scenario('articles: article create', 'post', new_article, user=user),
+        Scenario('articles: article update', 'patch', repeat(f'/articles/articles/{article}/', {'tags': [tag]}), user=user),
+        Scenario('articles: article delete', 'delete', delete_article, user=user),
+        Scenario('articles: article import (10 lines)', 'post', import_articles, user=staff, format='ndjson'),
+        Scenario('articles: article export', 'get', repeat('/articles/articles/export/'), user=staff),
+        Scenario('articles: content list', 'get', repeat('/articles/article-contents/')),
+        Scenario('articles: content detail', 'get', repeat(f'/articles/article-contents/{content}/')),
+        Scenario('articles: comment list', 'get', repeat('/articles/comments/')),
+        Scenario('articles: comment detail', 'get', repeat(f'/articles/comments/{comment}/')),
+        Scenario('articles: article manager retrieve', 'get', repeat(f'/articles/article-manager/{article}/'), user=user),
+        Scenario('articles: comment manager create', 'post', repeat(
+            '/articles/comment-manager/', {'article': article, 'content': 'Benchmark comment.'},
+        ), user=user),
+        Scenario('articles: comment batch create (10 comments)', 'post', repeat('/articles/comments/batch/', {
+            'comments': [{'article': pk, 'content': 'Benchmark comment.'} for pk in data['articles'][:10]],
+        }), user=user),
+    ]
+
+
+def send(client, scenario, path, data):
+    if scenario.format == 'ndjson':
+        response = client.generic(scenario.method.upper(), path, data, content_type='application/x-ndjson', **scenario.headers)
+    elif scenario.method == 'get':
+        response = client.get(path, data, **scenario.headers)
+    else:
+        response = getattr(client, scenario.method)(path, data, format='json', **scenario.headers)
+    if response.streaming:
+        return response, sum(len(chunk) for chunk in response.streaming_content)
+    return response, len(response.content)
+
+
+def run_scenario(scenario, requests, warmup=0, cold=False):
+    client = APIClient()
+    if scenario.user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {UserRefreshToken.for_user(scenario.user).access_token}')
+    calls = scenario.prepare(requests + warmup)
+    timings, queries, sizes, statuses = [], [], [], Counter()
+    for number, (path, data) in enumerate(calls):
+        if cold:
+            get_cache().clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response, size = send(client, scenario, path, data)
+            elapsed = time.perf_counter() - started
+        if number < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(len(captured))
+        sizes.append(size)
+        statuses[response.status_code] += 1
+    timings.sort()
+    return {
+        'name': scenario.name,
+        'method': scenario.method.upper(),
+        'path': calls[0][0] if calls else None,
+        'requests': len(timings),
+        'status': {str(code): count for code, count in sorted(statuses.items())},
+        'p50_ms': percentile(timings, 0.50),
+        'p95_ms': percentile(timings, 0.95),
+        'p99_ms': percentile(timings, 0.99),
+        'mean_ms': statistics.fmean(timings) if timings else None,
+        'queries_per_request': statistics.fmean(queries) if queries else None,
+        'max_queries': max(queries, default=None),
+        'bytes_per_response': statistics.fmean(sizes) if sizes else None,
+    }
+
+
+def run_benchmark(data, requests=50, warmup=5, cold=False, only=None):
+    """Run every scenario (or those whose name contains ``only``) and return one result per scenario."""
+    google = GoogleFixture()
+    # Expected 4xx responses would otherwise log one warning per request.
+    request_logger = logging.getLogger('django.request')
+    level = request_logger.level
+    request_logger.setLevel(logging.ERROR)
+    try:
+        # One benchmark user posts far faster than the comment rate limit allows.
+        with google.settings(), override_settings(COMMENT_RATE_LIMIT=None):
+            results = []
+            for scenario in get_scenarios(data, google):
+                if only and only not in scenario.name:
+                    continue
+                results.append(run_scenario(scenario, requests, warmup, cold))
+            return results
+    finally:
+        request_logger.setLevel(level)
+        google.close()
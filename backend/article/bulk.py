@@ -0,0 +1,171 @@
+import json
+from collections import Counter
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .cache import invalidate
+from .counters import adjust
+from .models import Article, ArticleContent, Category, Comment, Tag
+from .search import get_search_backend
+from .serializers import ArticleContentSerializer, TagListField
+from .snapshots import schedule
+
+BATCH_SIZE = 500
+
+
+class ArticleImportSerializer(serializers.Serializer):
+    """
+    One NDJSON record, in the same shape ``ArticleSerializer`` accepts, tags
+    given by id or name included. Category and tag ids are checked, and tag
+    names resolved, for the whole batch in ``import_batch`` rather than one
+    query per field.
+    """
+    category = serializers.IntegerField(allow_null=True, required=False)
+    tags = TagListField(required=False, default=list)
+    contents = ArticleContentSerializer(many=True)
+
+    def validate_contents(self, value):
+        languages = [content['language'] for content in value]
+        if len(set(languages)) != len(languages):
+            raise serializers.ValidationError('Each language may only appear once.')
+        return value
+
+
+def parse_lines(lines):
+    """Yield ``(line number, record or None, errors)`` for each non-blank NDJSON line."""
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield number, None, {'non_field_errors': [f'Invalid JSON: {e}']}
+            continue
+        serializer = ArticleImportSerializer(data=data)
+        if serializer.is_valid():
+            yield number, serializer.validated_data, None
+        else:
+            yield number, None, serializer.errors
+
+
+def import_batch(records, author):
+    """Insert validated ``(line, record)`` pairs with one INSERT per table; returns ``(created, errors)``."""
+    category_ids = {record.get('category') for _, record in records} - {None}
+    tag_ids = {tag for _, record in records for tag in record['tags'] if isinstance(tag, int)}
+    known_categories = set(Category.objects.filter(pk__in=category_ids).values_list('pk', flat=True))
+    known_tags = set(Tag.objects.filter(pk__in=tag_ids).values_list('pk', flat=True))
+
+    valid, errors = [], []
+    for number, record in records:
+        record_errors = {}
+        if record.get('category') is not None and record['category'] not in known_categories:
+            record_errors['category'] = [f"Invalid pk \"{record['category']}\" - object does not exist."]
+        missing = sorted({tag for tag in record['tags'] if isinstance(tag, int)} - known_tags)
+        if missing:
+            record_errors['tags'] = [f'Invalid pk "{pk}" - object does not exist.' for pk in missing]
+        if record_errors:
+            errors.append({'line': number, 'errors': record_errors})
+        else:
+            valid.append(record)
+    if not valid:
+        return 0, errors
+
+    with transaction.atomic():
+        # Named tags of the whole batch, missing ones created, in one INSERT and one SELECT.
+        by_name = Tag.objects.resolve(tag for record in valid for tag in record['tags'] if isinstance(tag, str))
+        for record in valid:
+            record['tags'] = [by_name[tag].pk if isinstance(tag, str) else tag for tag in record['tags']]
+        articles = Article.objects.bulk_create([
+            Article(author=author, category_id=record.get('category')) for record in valid
+        ])
+        contents = ArticleContent.objects.bulk_create([
+            ArticleContent(article=article, **content)
+            for article, record in zip(articles, valid)
+            for content in record['contents']
+        ])
+        Article.tags.through.objects.bulk_create([
+            Article.tags.through(article_id=article.pk, tag_id=tag)
+            for article, record in zip(articles, valid)
+            for tag in set(record['tags'])
+        ])
+        # bulk_create sends no signals, so do what the receivers would.
+        get_search_backend().index(contents)
+        adjust(Category, 'article_count', Counter(record.get('category') for record in valid))
+        adjust(Tag, 'article_count', Counter(tag for record in valid for tag in set(record['tags'])))
+        invalidate('articles', 'tags', 'categories')
+        schedule(article.pk for article in articles)
+    return len(articles), errors
+
+
+def import_articles(lines, author, batch_size=BATCH_SIZE):
+    """
+    Import NDJSON ``lines`` (any iterable of str or bytes) in batches.
+
+    Invalid lines are reported and skipped; each batch of valid lines is
+    committed in its own transaction, so memory stays bounded by ``batch_size``.
+    """
+    created, errors, batch = 0, [], []
+    for number, record, record_errors in parse_lines(lines):
+        if record_errors:
+            errors.append({'line': number, 'errors': record_errors})
+            continue
+        batch.append((number, record))
+        if len(batch) >= batch_size:
+            batch_created, batch_errors = import_batch(batch, author)
+            created += batch_created
+            errors.extend(batch_errors)
+            batch = []
+    if batch:
+        batch_created, batch_errors = import_batch(batch, author)
+        created += batch_created
+        errors.extend(batch_errors)
+    return {'created': created, 'errors': errors}
+
+
+def export_articles(chunk_size=BATCH_SIZE):
+    """Yield one NDJSON line per article without loading the table into memory."""
+    queryset = Article.objects.select_related('author').only(
+        'id', 'created_at', 'updated_at', 'category_id', 'author__id', 'author__email',
+    ).prefetch_related(
+        'tags',
+        'contents',
+    ).order_by('id')
+    for article in queryset.iterator(chunk_size=chunk_size):
+        record = {
+            'id': article.pk,
+            'author': article.author.email,
+            'category': article.category_id,
+            'tags': [tag.pk for tag in article.tags.all()],
+            'created_at': article.created_at,
+            'updated_at': article.updated_at,
+            'contents': [
+                {'language': content.language, 'title': content.title, 'body': content.body}
+                for content in article.contents.all()
+            ],
+        }
+        yield json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def create_comments(user, items):
+    """
+    Insert validated ``{'article': id, 'content': str}`` items as ``user``'s
+    comments with one INSERT, plus one UPDATE each for the counters and the
+    articles' ``updated_at``, however many articles they spread over.
+    """
+    articles = Counter(item['article'] for item in items)
+    with transaction.atomic():
+        comments = Comment.objects.bulk_create([
+            Comment(article_id=item['article'], user=user, content=item['content']) for item in items
+        ])
+        # bulk_create sends no signals, so do what the receivers would.
+        adjust(Article, 'comment_count', articles)
+        Article.objects.filter(pk__in=articles).update(updated_at=timezone.now())
+        invalidate('articles', *(f'article:{pk}' for pk in articles))
+        schedule(articles)
+    return comments
+
@@ -0,0 +1,146 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def get_versions(scopes):
+    """
+    Current generation of each scope. A missing generation is seeded from the
+    clock rather than 0 so an evicted counter can never match old entries.
+    """
+    cache = get_cache()
+    keys = [f'api-scope:{scope}' for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    cache = get_cache()
+    for scope in scopes:
+        key = f'api-scope:{scope}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate(*scopes):
+    """Bump the scopes once the current transaction commits, so readers never re-cache uncommitted data."""
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+class CachedResponseMixin:
+    """
+    Serve ``list``/``retrieve`` from the cache. Each entry is keyed on the
+    host, the view, the action, the object id, the query string,
+    ``get_language_key`` (empty unless the view localizes its output) and the
+    generations of the scopes returned by ``get_cache_scopes`` (by
+    default the view's basename), so bumping a scope (see ``article.signals``)
+    retires every entry built from it.
+    """
+    cache_timeout = None
+    # True while computing a response that will be stored; see backend.routers.ReplicaReadMixin.
+    filling_cache = False
+
+    def get_cache_scopes(self):
+        return [self.basename]
+
+    def should_cache(self, request):
+        return True
+
+    def get_language_key(self, request):
+        # Most payloads are the same in every language; views that localize override this.
+        return ''
+
+    def get_cache_key(self, request):
+        scopes = self.get_cache_scopes()
+        parts = [
+            request.get_host(),
+            self.basename,
+            self.action,
+            str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, '')),
+            request.GET.urlencode(),
+            self.get_language_key(request),
+            ','.join(map(str, get_versions(scopes))),
+        ]
+        return 'api:' + hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def cached(self, request, action, *args, **kwargs):
+        if not self.should_cache(request):
+            return action(request, *args, **kwargs)
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        self.filling_cache = True
+        response = action(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = self.cache_timeout or getattr(settings, 'API_CACHE_TIMEOUT', 300)
+            cache.set(key, response.data, timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(request, super().retrieve, *args, **kwargs)
+
+
+class ConditionalResponseMixin:
+    """
+    Answer ``list``/``retrieve`` with ETag and Last-Modified validators and
+    short-circuit to 304 when the client's copy is current. ``get_validators``
+    returns ``(fingerprint, last_modified)`` from cheap queries, before any
+    serialization, or ``(None, None)`` (the default) to skip validation. The
+    ETag also covers the query string, ``get_language_key`` and Accept
+    header because those change the representation.
+    """
+    def get_validators(self, request):
+        return None, None
+
+    def get_language_key(self, request):
+        return ''
+
+    def conditional(self, request, action, *args, **kwargs):
+        fingerprint, last_modified = self.get_validators(request)
+        if fingerprint is None:
+            return action(request, *args, **kwargs)
+        parts = [
+            str(fingerprint),
+            request.GET.urlencode(),
+            self.get_language_key(request),
+            request.META.get('HTTP_ACCEPT', ''),
+        ]
+        etag = quote_etag(hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = action(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(request, super().retrieve, *args, **kwargs)
+
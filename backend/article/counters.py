@@ -0,0 +1,46 @@
+"""
+Denormalized usage counters: ``Article.comment_count``, ``Tag.article_count``
+and ``Category.article_count``.
+
+``article.signals`` keeps them current with relative ``F()`` updates, so
+concurrent writers never overwrite each other's increments. Code that
+bypasses signals (``bulk_create``, raw SQL) calls ``adjust`` itself, and
+``reconcile`` recomputes everything from the source tables.
+"""
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Article, Category, Comment, Tag
+
+
+def adjust(model, field, deltas):
+    """Add ``deltas`` (``{pk: amount}``) to ``field`` of the matching rows in one UPDATE."""
+    deltas = {pk: amount for pk, amount in deltas.items() if pk is not None and amount}
+    if not deltas:
+        return
+    amounts = set(deltas.values())
+    if len(amounts) == 1:
+        change = Value(amounts.pop())
+    else:
+        change = Case(*[When(pk=pk, then=Value(amount)) for pk, amount in deltas.items()], default=Value(0))
+    model.objects.filter(pk__in=deltas).update(**{field: F(field) + change})
+
+
+def count_of(queryset, field):
+    """Correlated subquery counting the rows of ``queryset`` whose ``field`` points at the outer row."""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+def recount(model, field, expression):
+    """Rewrite ``field`` where it differs from ``expression``; returns how many rows were wrong."""
+    return model.objects.annotate(actual=expression).exclude(**{field: F('actual')}).update(**{field: expression})
+
+
+def reconcile():
+    """Recompute every counter in three UPDATE statements; returns the number of corrected rows per model."""
+    return {
+        'articles': recount(Article, 'comment_count', count_of(Comment.objects.all(), 'article')),
+        'tags': recount(Tag, 'article_count', count_of(Article.tags.through.objects.all(), 'tag')),
+        'categories': recount(Category, 'article_count', count_of(Article.objects.all(), 'category')),
+    }
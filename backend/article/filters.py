@@ -1,5 +1,7 @@
 import django_filters
+from rest_framework import filters
 from .models import Article, Category, Tag
+from .search import get_search_backend
 
 class ArticleFilter(django_filters.FilterSet):
     category = django_filters.ModelChoiceFilter(queryset=Category.objects.all())
@@ -11,4 +13,21 @@ class ArticleFilter(django_filters.FilterSet):
         fields = ['category', 'tags']
 
     def filter_keyword(self, queryset, name, value):
-        return queryset.filter(contents__title__icontains=value)
\ No newline at end of file
+        return get_search_backend().search(queryset, value, fields=['title'], rank=False)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Drop-in for ``SearchFilter`` that matches ``?search=`` through the
+    full-text index instead of ``icontains`` scans. ``search_fields`` name
+    the ``contents__title`` / ``contents__body`` columns to match against.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        fields = [
+            field.split('__')[-1]
+            for field in getattr(view, 'search_fields', None) or ['contents__title', 'contents__body']
+        ]
+        return get_search_backend().search(queryset, ' '.join(terms), fields=fields)
\ No newline at end of file
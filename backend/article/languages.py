@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+
+def get_language_chain(request):
+    """
+    Ordered translation preferences for ``request``: ``?lang=`` first, then
+    the ``Accept-Language`` entries, then ``ARTICLE_DEFAULT_LANGUAGE``.
+
+    Returns None when the client expressed no preference at all (no
+    ``?lang=`` and no ``Accept-Language``) or asked for ``?lang=all``,
+    meaning every translation should be returned.
+    """
+    supported = settings.ARTICLE_LANGUAGES
+    requested = request.query_params.get('lang', '').lower()
+    if requested == 'all':
+        return None
+
+    header = request.META.get('HTTP_ACCEPT_LANGUAGE', '')
+    if not requested and not header:
+        return None
+
+    chain = []
+    if requested in supported:
+        chain.append(requested)
+    for code, _ in parse_accept_lang_header(header):
+        code = code.split('-')[0].lower()
+        if code in supported and code not in chain:
+            chain.append(code)
+    if settings.ARTICLE_DEFAULT_LANGUAGE not in chain:
+        chain.append(settings.ARTICLE_DEFAULT_LANGUAGE)
+    return chain
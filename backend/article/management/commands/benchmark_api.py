@@ -0,0 +1,94 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from article.benchmark import run_benchmark, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database, drive every account and article route '
+        'through the test client and report p50/p95/p99 latency, queries per '
+        'request and response sizes as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--articles', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per route.')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per route.')
+        parser.add_argument('--cold', action='store_true', help='Clear the API cache before every request.')
+        parser.add_argument('--only', help='Only run routes whose name contains this text.')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+        parser.add_argument('--compare', help='A previous JSON report to print per-route differences against.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            data = seed(
+                users=options['users'], articles=options['articles'], comments=options['comments'],
+                tags=options['tags'], categories=options['categories'],
+            )
+            results = run_benchmark(data, options['requests'], options['warmup'], options['cold'], options['only'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'commit': self.get_commit(),
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'options': {key: options[key] for key in (
+                    'users', 'articles', 'comments', 'tags', 'categories', 'requests', 'warmup', 'cold', 'only',
+                )},
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                self.compare(json.load(f)['results'], results)
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def compare(self, before, after):
+        before = {result['name']: result for result in before}
+        # Written to stderr so the JSON on stdout stays parseable.
+        for result in after:
+            previous = before.get(result['name'])
+            if previous is None:
+                continue
+            self.stderr.write(
+                f"{result['name']:<50} p50 {self.change(previous['p50_ms'], result['p50_ms'])} "
+                f"p95 {self.change(previous['p95_ms'], result['p95_ms'])} "
+                f"queries {previous['queries_per_request']:.1f} -> {result['queries_per_request']:.1f}"
+            )
+
+    def change(self, before, after):
+        if not before or after is None:
+            return 'n/a'
+        return f'{after:8.2f}ms ({(after - before) / before:+.0%})'
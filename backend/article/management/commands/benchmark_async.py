@@ -0,0 +1,107 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from article.benchmark import percentile, seed
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput of the sync (WSGI, thread pool) article reads with '
+        'their async (ASGI, event loop) variants at a given concurrency, on a '
+        'throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint and path.')
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--threads', type=int, default=8, help='Worker threads standing in for the WSGI server.')
+        parser.add_argument('--with-cache', action='store_true', help='Keep the API response cache on (the async views never use it).')
+        parser.add_argument('--output', help='Also write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            data = seed(users=20, articles=options['articles'], comments=options['comments'])
+            article, category, tag = data['articles'][0], data['categories'][0], data['tags'][0]
+            endpoints = [
+                ('category list', '/articles/categories/', '/articles/async/categories/'),
+                ('category detail', f'/articles/categories/{category}/', f'/articles/async/categories/{category}/'),
+                ('tag list', '/articles/tags/', '/articles/async/tags/'),
+                ('tag detail', f'/articles/tags/{tag}/', f'/articles/async/tags/{tag}/'),
+                ('article list', '/articles/articles/', '/articles/async/articles/'),
+                ('article detail', f'/articles/articles/{article}/', f'/articles/async/articles/{article}/'),
+            ]
+            with override_settings(**({} if options['with_cache'] else {'CACHES': NO_CACHE})):
+                results = [
+                    {
+                        'name': name,
+                        'wsgi': self.run_sync(sync_path, options),
+                        'asgi': asyncio.run(self.run_async(async_path, options)),
+                    }
+                    for name, sync_path, async_path in endpoints
+                ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'endpoint':<18}{'WSGI req/s':>12}{'p50':>9}{'p99':>9}{'ASGI req/s':>12}{'p50':>9}{'p99':>9}")
+        for result in results:
+            wsgi, asgi = result['wsgi'], result['asgi']
+            self.stdout.write(
+                f"{result['name']:<18}{wsgi['throughput']:>12.0f}{wsgi['p50_ms']:>9.2f}{wsgi['p99_ms']:>9.2f}"
+                f"{asgi['throughput']:>12.0f}{asgi['p50_ms']:>9.2f}{asgi['p99_ms']:>9.2f}"
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump({'options': {key: options[key] for key in ('articles', 'requests', 'concurrency', 'threads', 'with_cache')}, 'results': results}, f, indent=2)
+
+    def summarize(self, timings, elapsed, statuses):
+        timings.sort()
+        return {
+            'throughput': len(timings) / elapsed,
+            'p50_ms': percentile(timings, 0.50),
+            'p99_ms': percentile(timings, 0.99),
+            'errors': sum(status >= 400 for status in statuses),
+        }
+
+    def run_sync(self, path, options):
+        """Requests beyond ``--threads`` queue for a free worker, as they would behind a WSGI server."""
+        client = Client()
+
+        def request(_):
+            started = time.perf_counter()
+            status = client.get(path).status_code
+            return (time.perf_counter() - started) * 1000, status
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(options['threads'], options['concurrency'])) as pool:
+            results = list(pool.map(request, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+        return self.summarize([timing for timing, _ in results], elapsed, [status for _, status in results])
+
+    async def run_async(self, path, options):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def request():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                return (time.perf_counter() - started) * 1000, response.status_code
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(request() for _ in range(options['requests'])))
+        elapsed = time.perf_counter() - started
+        return self.summarize([timing for timing, _ in results], elapsed, [status for _, status in results])
@@ -0,0 +1,152 @@
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from account.models import CustomUser, PasswordResetToken
+from article.models import Article, ArticleContent, Comment
+
+ALIAS = 'benchmark'
+LANGUAGES = ['en', 'fr', 'ar']
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway SQLite database and compare query plans and latencies '
+        'of the main endpoint queries before and after the index migrations.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=1_000_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--reset-tokens', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query; the median is reported.')
+        parser.add_argument('--database', help='SQLite file to use (default: a temporary file, deleted afterwards).')
+
+    def handle(self, *args, **options):
+        path = options['database'] or os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+        connections.databases[ALIAS] = {**connections.databases['default'], 'ENGINE': 'django.db.backends.sqlite3', 'NAME': path, 'OPTIONS': {}}
+        try:
+            self.stdout.write(f'Using {path}')
+            # Everything up to, but not including, the index migrations.
+            call_command('migrate', 'article', '0002', database=ALIAS, verbosity=0)
+            call_command('migrate', 'account', '0002', database=ALIAS, verbosity=0)
+            self.seed(options)
+            before = self.measure(options['repeat'])
+            # Only the index migrations, so later schema and data migrations stay out of the comparison.
+            call_command('migrate', 'article', '0003', database=ALIAS, verbosity=0)
+            call_command('migrate', 'account', '0003', database=ALIAS, verbosity=0)
+            after = self.measure(options['repeat'])
+            self.report(before, after)
+        finally:
+            connections[ALIAS].close()
+            del connections.databases[ALIAS]
+            if not options['database']:
+                os.remove(path)
+
+    def executemany(self, sql, rows, chunk_size=50_000):
+        with connections[ALIAS].cursor() as cursor:
+            for start in range(0, len(rows), chunk_size):
+                cursor.executemany(sql, rows[start:start + chunk_size])
+
+    def seed(self, options):
+        rng = random.Random(42)
+        now = timezone.now()
+        users, articles, comments = options['users'], options['articles'], options['comments']
+        self.stdout.write(f'Seeding {users} users, {articles} articles, {comments} comments...')
+        started = time.perf_counter()
+        with transaction.atomic(using=ALIAS):
+            self.insert_rows(rng, now, options)
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+    def insert_rows(self, rng, now, options):
+        users, articles, comments = options['users'], options['articles'], options['comments']
+        self.executemany(
+            f'INSERT INTO {CustomUser._meta.db_table} '
+            '(id, password, is_superuser, username, first_name, last_name, is_staff, is_active, date_joined, '
+            'email, role, is_email_verified, email_verification_token) '
+            "VALUES (%s, '', 0, %s, '', '', 0, 1, %s, %s, 'blogger', 1, %s)",
+            [(i, f'user{i}', now, f'user{i}@example.com', uuid.uuid4().hex) for i in range(1, users + 1)],
+        )
+        self.executemany(
+            f'INSERT INTO {Article._meta.db_table} (id, author_id, category_id, created_at, updated_at) '
+            'VALUES (%s, %s, NULL, %s, %s)',
+            [
+                (i, rng.randint(1, users), now - timedelta(minutes=articles - i), now - timedelta(minutes=rng.randint(0, articles)))
+                for i in range(1, articles + 1)
+            ],
+        )
+        self.executemany(
+            f'INSERT INTO {ArticleContent._meta.db_table} (id, article_id, language, title, body) VALUES (%s, %s, %s, %s, %s)',
+            [(i, i, LANGUAGES[i % len(LANGUAGES)], f'Article {i}', 'Lorem ipsum dolor sit amet.') for i in range(1, articles + 1)],
+        )
+        self.executemany(
+            f'INSERT INTO {Comment._meta.db_table} (id, article_id, user_id, content, created_at) VALUES (%s, %s, %s, %s, %s)',
+            [
+                (i, rng.randint(1, articles), rng.randint(1, users), 'Nice post.', now - timedelta(seconds=comments - i))
+                for i in range(1, comments + 1)
+            ],
+        )
+        self.executemany(
+            f'INSERT INTO {PasswordResetToken._meta.db_table} (id, user_id, token, created_at, expires_at) VALUES (%s, %s, %s, %s, %s)',
+            [
+                (i, rng.randint(1, users), uuid.uuid4().hex, now, now + timedelta(hours=rng.randint(-48, 1)))
+                for i in range(1, options['reset_tokens'] + 1)
+            ],
+        )
+
+    def get_queries(self):
+        now = timezone.now()
+        middle = Article.objects.using(ALIAS).order_by('id').values_list('created_at', 'id')[
+            Article.objects.using(ALIAS).count() // 2
+        ]
+        busy_article = Comment.objects.using(ALIAS).values_list('article_id', flat=True).first()
+        token = CustomUser.objects.using(ALIAS).values_list('email_verification_token', flat=True).last()
+        # The schema stops at the index migrations; comment_count only arrives in article 0004.
+        articles = Article.objects.using(ALIAS).defer('comment_count')
+        return {
+            'article list (first page)': articles.for_list().order_by('-created_at', '-id')[:21],
+            'article list (deep page)': articles.for_list().filter(
+                Q(created_at__lt=middle[0]) | Q(created_at=middle[0], id__lt=middle[1]),
+            ).order_by('-created_at', '-id')[:21],
+            'article list ?ordering=updated_at': articles.for_list().order_by('updated_at', 'id')[:21],
+            'comment list': Comment.objects.using(ALIAS).order_by('-created_at', '-id')[:21],
+            'comments of an article': Comment.objects.using(ALIAS).filter(article_id=busy_article).order_by('-created_at', '-id')[:21],
+            'contents in one language': ArticleContent.objects.using(ALIAS).filter(language='fr').order_by('article_id')[:21],
+            'email verification lookup': CustomUser.objects.using(ALIAS).filter(email_verification_token=token),
+            'expired reset tokens': PasswordResetToken.objects.using(ALIAS).filter(expires_at__lt=now).values('id')[:1000],
+        }
+
+    def measure(self, repeat):
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('ANALYZE')
+        results = {}
+        for name, queryset in self.get_queries().items():
+            plan = queryset.explain()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            results[name] = {'plan': plan, 'median_ms': timings[len(timings) // 2] * 1000}
+        return results
+
+    def report(self, before, after):
+        for name in before:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f"  before: {before[name]['median_ms']:.2f} ms")
+            for line in before[name]['plan'].splitlines():
+                self.stdout.write(f'    {line}')
+            self.stdout.write(f"  after:  {after[name]['median_ms']:.2f} ms")
+            for line in after[name]['plan'].splitlines():
+                self.stdout.write(f'    {line}')
@@ -0,0 +1,67 @@
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from article.benchmark import seed
+from article.models import Article
+from article.serializers import ArticleListSerializer, ArticleSerializer
+from backend import renderers
+
+
+class Command(BaseCommand):
+    help = (
+        'Time rendering and parsing of large article pages with DRF\'s stdlib '
+        'JSON renderer/parser and the orjson ones, on a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=1000, help='Articles per page.')
+        parser.add_argument('--repeat', type=int, default=50, help='Runs per measurement; the median is reported.')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            raise CommandError('orjson is not installed.')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            seed(users=20, articles=options['articles'], comments=options['articles'] * 5)
+            pages = {
+                f"list page ({options['articles']} articles)": ArticleListSerializer(
+                    Article.objects.for_list(languages=['en']).order_by('-created_at'), many=True,
+                    context={'languages': ['en']},
+                ).data,
+                f"detail pages ({options['articles']} articles)": ArticleSerializer(
+                    Article.objects.with_related(comments_limit=20).order_by('-created_at'), many=True,
+                ).data,
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'payload':<42}{'size':>10}{'stdlib':>11}{'orjson':>11}{'speedup':>9}")
+        for name, data in pages.items():
+            body = JSONRenderer().render(data)
+            if renderers.ORJSONRenderer().render(data) != body:
+                raise CommandError(f'{name}: the renderers disagree.')
+            for operation, stdlib, fast in (
+                ('render', lambda: JSONRenderer().render(data), lambda: renderers.ORJSONRenderer().render(data)),
+                ('parse', lambda: JSONParser().parse(io.BytesIO(body)), lambda: renderers.ORJSONParser().parse(io.BytesIO(body))),
+            ):
+                before, after = self.measure(stdlib, options['repeat']), self.measure(fast, options['repeat'])
+                self.stdout.write(
+                    f"{operation + ' ' + name:<42}{len(body) / 1024:>8.0f}KB{before:>9.2f}ms{after:>9.2f}ms{before / after:>8.1f}x"
+                )
+
+    def measure(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,20 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from article.bulk import BATCH_SIZE, export_articles
+
+
+class Command(BaseCommand):
+    help = 'Export every article as NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Output file, or '-' for stdout.")
+        parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            sys.stdout.writelines(export_articles(chunk_size=options['chunk_size']))
+            return
+        with open(options['path'], 'w', encoding='utf-8') as f:
+            f.writelines(export_articles(chunk_size=options['chunk_size']))
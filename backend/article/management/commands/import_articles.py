@@ -0,0 +1,31 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from article.bulk import BATCH_SIZE, import_articles
+
+
+class Command(BaseCommand):
+    help = 'Import articles from an NDJSON file (one ArticleSerializer-shaped object per line).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file, or '-' for stdin.")
+        parser.add_argument('--author', required=True, help='Email of the user the articles are attributed to.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            author = get_user_model().objects.get(email=options['author'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['author']}.")
+
+        if options['path'] == '-':
+            result = import_articles(sys.stdin, author, batch_size=options['batch_size'])
+        else:
+            with open(options['path'], encoding='utf-8') as f:
+                result = import_articles(f, author, batch_size=options['batch_size'])
+
+        for error in result['errors']:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {result['created']} article(s), {len(result['errors'])} line(s) rejected."))
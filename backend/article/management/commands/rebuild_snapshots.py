@@ -0,0 +1,40 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from article.models import Article
+from article.snapshots import refresh
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-render the stored JSON detail responses of every article, '
+        'spreading the batches over a pool of worker processes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='1 renders in this process.')
+
+    def handle(self, *args, **options):
+        ids = list(Article.objects.order_by('pk').values_list('pk', flat=True))
+        size = options['batch_size']
+        batches = [ids[start:start + size] for start in range(0, len(ids), size)]
+
+        started = time.perf_counter()
+        if options['workers'] <= 1 or len(batches) <= 1:
+            written = sum(refresh(batch) for batch in batches)
+        else:
+            # Forked workers open their own connections instead of sharing ours.
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=options['workers'], mp_context=context) as pool:
+                written = sum(pool.map(refresh, batches))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {written} snapshot(s) of {len(ids)} article(s) in {elapsed:.1f}s.'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from article.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recompute the comment and article counters of articles, tags and categories.'
+
+    def handle(self, *args, **options):
+        for model, corrected in reconcile().items():
+            self.stdout.write(f'Corrected {corrected} {model}.')
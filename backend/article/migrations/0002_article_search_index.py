@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from article.search import get_search_backend
+
+    backend = get_search_backend(schema_editor.connection)
+    backend.setup(schema_editor.connection)
+    ArticleContent = apps.get_model('article', 'ArticleContent')
+    backend.index(ArticleContent.objects.using(schema_editor.connection.alias).all())
+
+
+def drop_search_index(apps, schema_editor):
+    from article.search import get_search_backend
+
+    get_search_backend(schema_editor.connection).teardown(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('article', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(queryset, field):
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Article = apps.get_model('article', 'Article')
+    Category = apps.get_model('article', 'Category')
+    Comment = apps.get_model('article', 'Comment')
+    Tag = apps.get_model('article', 'Tag')
+    Article.objects.update(comment_count=count_of(Comment.objects.all(), 'article'))
+    Tag.objects.update(article_count=count_of(Article.tags.through.objects.all(), 'tag'))
+    Category.objects.update(article_count=count_of(Article.objects.all(), 'category'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('article', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='article_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='article_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['article_count', 'id'], name='category_article_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['article_count', 'id'], name='tag_article_count_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
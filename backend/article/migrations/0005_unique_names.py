@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:28
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    """Fold rows sharing a name into the oldest one before the unique constraint goes on."""
+    Article = apps.get_model('article', 'Article')
+    Category = apps.get_model('article', 'Category')
+    Tag = apps.get_model('article', 'Tag')
+    ArticleTag = Article.tags.through
+
+    for model in (Category, Tag):
+        duplicates = model.objects.values('name').annotate(keep=Min('pk'), rows=Count('pk')).filter(rows__gt=1)
+        for duplicate in duplicates:
+            keep = duplicate['keep']
+            others = list(model.objects.filter(name=duplicate['name']).exclude(pk=keep).values_list('pk', flat=True))
+            if model is Category:
+                Article.objects.filter(category_id__in=others).update(category_id=keep)
+                model.objects.filter(pk=keep).update(article_count=Article.objects.filter(category_id=keep).count())
+            else:
+                # One duplicate at a time: an article tagged with two of them must not get the kept tag twice.
+                for other in others:
+                    tagged = ArticleTag.objects.filter(tag_id=keep).values('article_id')
+                    ArticleTag.objects.filter(tag_id=other, article_id__in=tagged).delete()
+                    ArticleTag.objects.filter(tag_id=other).update(tag_id=keep)
+                model.objects.filter(pk=keep).update(article_count=ArticleTag.objects.filter(tag_id=keep).count())
+            model.objects.filter(pk__in=others).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('article', '0004_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='name',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+    ]
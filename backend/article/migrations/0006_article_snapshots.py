@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('article', '0005_unique_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=5)),
+                ('position', models.PositiveIntegerField(null=True)),
+                ('body', models.BinaryField()),
+                ('rendered_at', models.DateTimeField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='article.article')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='articlesnapshot',
+            constraint=models.UniqueConstraint(fields=('article', 'language'), name='article_snapshot_unique'),
+        ),
+    ]
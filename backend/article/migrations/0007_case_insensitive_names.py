@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:58
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+from django.db.models.functions import Lower
+
+
+def merge_case_duplicates(apps, schema_editor):
+    """Fold rows whose names differ only in case into the oldest one, as 0005 did for exact duplicates."""
+    Article = apps.get_model('article', 'Article')
+    Category = apps.get_model('article', 'Category')
+    Tag = apps.get_model('article', 'Tag')
+    ArticleSnapshot = apps.get_model('article', 'ArticleSnapshot')
+    ArticleTag = Article.tags.through
+
+    for model in (Category, Tag):
+        rows = model.objects.annotate(folded=Lower('name'))
+        duplicates = rows.values('folded').annotate(keep=Min('pk'), count=Count('pk')).filter(count__gt=1)
+        for duplicate in duplicates:
+            keep = duplicate['keep']
+            others = list(rows.filter(folded=duplicate['folded']).exclude(pk=keep).values_list('pk', flat=True))
+            if model is Category:
+                # Snapshots embed the old id; without one the regular view answers until the next write.
+                ArticleSnapshot.objects.filter(article__category_id__in=others).delete()
+                Article.objects.filter(category_id__in=others).update(category_id=keep)
+                model.objects.filter(pk=keep).update(article_count=Article.objects.filter(category_id=keep).count())
+            else:
+                ArticleSnapshot.objects.filter(article__tags__in=others).delete()
+                for other in others:
+                    tagged = ArticleTag.objects.filter(tag_id=keep).values('article_id')
+                    ArticleTag.objects.filter(tag_id=other, article_id__in=tagged).delete()
+                    ArticleTag.objects.filter(tag_id=other).update(tag_id=keep)
+                model.objects.filter(pk=keep).update(article_count=ArticleTag.objects.filter(tag_id=keep).count())
+            model.objects.filter(pk__in=others).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('article', '0006_article_snapshots'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(Lower('name'), name='category_name_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(Lower('name'), name='tag_name_ci_unique'),
+        ),
+    ]
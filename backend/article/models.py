@@ -1,25 +1,157 @@
 from django.db import models
+from django.db.models.functions import Lower, RowNumber, Substr
 from django.conf import settings
 
+EXCERPT_LENGTH = 200
+
+class NamedQuerySet(models.QuerySet):
+    """Names are unique ignoring case: "Python" and "python" are the same row."""
+    def matching(self, names):
+        """Rows named like any of ``names``, ignoring case."""
+        condition = models.Q()
+        for name in names:
+            condition |= models.Q(name__iexact=name)
+        return self.filter(condition) if condition else self.none()
+
+    def resolve(self, names):
+        """
+        Map each of ``names`` to its row, creating the missing ones with the
+        first spelling given: one ``INSERT ... ON CONFLICT DO NOTHING`` and
+        one SELECT whatever the number of names. Relies on the unique
+        constraint on the lowercased name, so concurrent callers racing on
+        the same new name both end up with the same row. Rows created here
+        send no ``post_save``.
+        """
+        names = list(names)
+        spellings = {}
+        for name in names:
+            spellings.setdefault(name.lower(), name)
+        if not spellings:
+            return {}
+        self.bulk_create([self.model(name=name) for name in spellings.values()], ignore_conflicts=True)
+        rows = {obj.name.lower(): obj for obj in self.matching(spellings.values())}
+        return {name: rows[name.lower()] for name in names}
+
 class Category(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Maintained by article.signals; see article.counters.
+    article_count = models.PositiveIntegerField(default=0)
+
+    objects = NamedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['article_count', 'id'], name='category_article_count_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='category_name_ci_unique'),
+        ]
 
     def __str__(self):
         return self.name
 
 class Tag(models.Model):
-    name = models.CharField(max_length=50)
+    name = models.CharField(max_length=50, unique=True)
+    article_count = models.PositiveIntegerField(default=0)
+
+    objects = NamedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['article_count', 'id'], name='tag_article_count_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='tag_name_ci_unique'),
+        ]
 
     def __str__(self):
         return self.name
 
+class ArticleContentQuerySet(models.QuerySet):
+    def preferred(self, languages):
+        """
+        Keep one translation per article: the first of ``languages`` it has,
+        otherwise its oldest translation.
+        """
+        rank = models.Case(
+            *[models.When(language=code, then=models.Value(i)) for i, code in enumerate(languages)],
+            default=models.Value(len(languages)),
+        )
+        best = ArticleContent.objects.filter(article=models.OuterRef('article_id')).order_by(rank, 'id').values('id')[:1]
+        return self.filter(pk=models.Subquery(best))
+
+class ArticleQuerySet(models.QuerySet):
+    def for_list(self, languages=None):
+        """
+        Load what ArticleListSerializer renders: titles and excerpts, never full bodies or comments.
+        With ``languages`` only the preferred translation of each article is loaded.
+        """
+        contents = ArticleContent.objects.only('id', 'article_id', 'language', 'title').annotate(
+            # One extra character tells the serializer whether the body was cut.
+            excerpt=Substr('body', 1, EXCERPT_LENGTH + 1),
+        )
+        if languages:
+            contents = contents.preferred(languages)
+        return self.select_related('author').only(
+            'id', 'created_at', 'updated_at', 'category_id', 'comment_count', 'author__id', 'author__email',
+        ).prefetch_related(
+            models.Prefetch('tags', queryset=Tag.objects.only('id')),
+            models.Prefetch('contents', queryset=contents),
+        )
+
+    def with_related(self, comments_limit=None, languages=None):
+        """
+        Eager-load everything ArticleSerializer renders in a fixed number of queries.
+        With ``comments_limit`` only the latest N comments of each article are
+        loaded (newest first); ``comment_count`` still counts all of them.
+        With ``languages`` only the preferred translation is loaded.
+        """
+        contents = ArticleContent.objects.only('id', 'article_id', 'language', 'title', 'body')
+        if languages:
+            contents = contents.preferred(languages)
+        comments = Comment.objects.select_related('user').only(
+            'id', 'article_id', 'content', 'created_at', 'user__id', 'user__email',
+        )
+        if comments_limit is not None:
+            # Rank within each article rather than slicing: Django 4.2 cannot
+            # prefetch a sliced queryset onto a single object.
+            comments = comments.annotate(thread_position=models.Window(
+                RowNumber(),
+                partition_by=models.F('article_id'),
+                order_by=[models.F('created_at').desc(), models.F('id').desc()],
+            )).filter(thread_position__lte=comments_limit).order_by('-created_at', '-id')
+        return self.select_related('author').only(
+            'id', 'created_at', 'updated_at', 'category_id', 'comment_count', 'author__id', 'author__email',
+        ).prefetch_related(
+            models.Prefetch('tags', queryset=Tag.objects.only('id')),
+            models.Prefetch('contents', queryset=contents),
+            models.Prefetch('comments', queryset=comments),
+        )
+
 class Article(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
     tags = models.ManyToManyField(Tag)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    objects = ArticleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination and OrderingFilter seek on (field, id).
+            models.Index(fields=['created_at', 'id'], name='article_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='article_updated_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the category counter notice when a save moves the article.
+        instance._loaded_category_id = instance.__dict__.get('category_id', models.DEFERRED)
+        return instance
 
     def __str__(self):
         return f"Article {self.id} by {self.author.username}"
@@ -30,8 +162,13 @@ class ArticleContent(models.Model):
     title = models.CharField(max_length=200)
     body = models.TextField()
 
+    objects = ArticleContentQuerySet.as_manager()
+
     class Meta:
         unique_together = ('article', 'language')
+        indexes = [
+            models.Index(fields=['language', 'article'], name='content_language_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.language})"
@@ -42,5 +179,29 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Per-article threads and the global comment list, newest first.
+            models.Index(fields=['article', 'created_at', 'id'], name='comment_article_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='comment_created_idx'),
+        ]
+
     def __str__(self):
-        return f"Comment by {self.user.username} on Article {self.article.id}"
\ No newline at end of file
+        return f"Comment by {self.user.username} on Article {self.article.id}"
+
+class ArticleSnapshot(models.Model):
+    """
+    The rendered JSON of one article detail response, kept by article.snapshots.
+    ``language`` is a translation code, or ``all`` for the every-translation payload.
+    """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='snapshots')
+    language = models.CharField(max_length=5)
+    # Id of the translation, so a fallback can pick the oldest one like ArticleContentQuerySet.preferred.
+    position = models.PositiveIntegerField(null=True)
+    body = models.BinaryField()
+    rendered_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'language'], name='article_snapshot_unique'),
+        ]
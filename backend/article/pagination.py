@@ -0,0 +1,169 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import filters
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on ``(<ordering field>, id)``.
+
+    Each page is fetched with a ``WHERE (field, id) > (last field, last id)``
+    range condition instead of an OFFSET, so the cost of a page does not
+    depend on how deep it is, and rows inserted while a client walks the
+    list never shift the pages it has not read yet.
+
+    The ordering field comes from the view's ``OrderingFilter`` (the
+    ``ordering`` query parameter, restricted to the view's ``ordering_fields``) and falls
+    back to ``view.ordering``, or to the ``search_rank`` annotation of a
+    full-text search; ``id`` is always appended as the tie-breaker.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    default_ordering = '-created_at'
+    rank_annotation = 'search_rank'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request, view)))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        The unevaluated query for the requested page, one row longer than the
+        page to detect whether another page follows. Async views evaluate it
+        themselves and hand the rows to ``set_page``.
+        """
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request, queryset)
+
+        # A "previous" cursor walks the list backwards and flips the page afterwards.
+        self.cursor = cursor
+        self.reverse = cursor is not None and cursor['r']
+        descending = self.descending != self.reverse
+        if cursor is not None:
+            queryset = queryset.filter(self.get_position_filter(cursor, descending))
+        order = ['-' + name if descending else name for name in self.get_key_fields()]
+        return queryset.order_by(*order)[:self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = self.cursor is not None and (has_more if self.reverse else True)
+        return self.page
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        default = getattr(view, 'ordering', None) or self.default_ordering
+        if isinstance(default, (list, tuple)):
+            default = default[0]
+        ordering = [default]
+        if self.rank_annotation in queryset.query.annotations:
+            ordering = [self.rank_annotation]
+        if view is not None and any(issubclass(backend, filters.OrderingFilter) for backend in getattr(view, 'filter_backends', [])):
+            ordering_filter = filters.OrderingFilter()
+            if request.query_params.get(ordering_filter.ordering_param):
+                ordering = ordering_filter.get_ordering(request, queryset, view) or ordering
+        term = ordering[0]
+        descending = term.startswith('-')
+        field = term.lstrip('-')
+        if field == 'id':
+            field = None
+        return field, descending
+
+    def get_key_fields(self):
+        return [self.field, 'id'] if self.field else ['id']
+
+    def get_position_filter(self, cursor, descending):
+        lookup = 'lt' if descending else 'gt'
+        pk = cursor['id']
+        if not self.field:
+            return Q(**{f'id__{lookup}': pk})
+        value = cursor['v']
+        return Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'id__{lookup}': pk})
+
+    def get_field(self, queryset):
+        if self.field in queryset.query.annotations:
+            return queryset.query.annotations[self.field].output_field
+        return self.model._meta.get_field(self.field)
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            cursor = {'id': int(data['id']), 'r': bool(data.get('r', False)), 'v': None}
+            if self.field:
+                cursor['v'] = self.get_field(queryset).to_python(data['v'])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if self.field and cursor['v'] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, instance, reverse):
+        data = {'id': instance.pk}
+        if self.field:
+            value = getattr(instance, self.field)
+            data['v'] = value.isoformat() if hasattr(value, 'isoformat') else value
+        if reverse:
+            data['r'] = True
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
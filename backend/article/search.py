@@ -0,0 +1,240 @@
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Article, ArticleContent
+
+SEARCH_FIELDS = ('title', 'body')
+
+
+def parse_terms(query):
+    """Split free text into plain word tokens so no user input reaches the query syntax."""
+    return re.findall(r'\w+', query or '')
+
+
+class BaseSearchBackend:
+    """
+    Keeps a full-text index of ArticleContent rows and filters Article querysets with it.
+
+    ``search`` annotates ``search_rank`` on the returned queryset; lower ranks
+    are better matches on every backend so callers can sort ascending.
+    The index lives in the database of ``connection``.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+
+    def setup(self, connection):
+        pass
+
+    def teardown(self, connection):
+        pass
+
+    def index(self, contents):
+        pass
+
+    def remove(self, content_ids):
+        pass
+
+    def rebuild(self, batch_size=1000):
+        self.remove_all()
+        contents = ArticleContent.objects.using(self.connection.alias).only(
+            'id', 'article_id', 'language', 'title', 'body',
+        ).order_by('id')
+        batch = []
+        for content in contents.iterator(chunk_size=batch_size):
+            batch.append(content)
+            if len(batch) >= batch_size:
+                self.index(batch)
+                batch = []
+        if batch:
+            self.index(batch)
+
+    def remove_all(self):
+        pass
+
+    def search(self, queryset, query, fields=SEARCH_FIELDS, rank=True):
+        """Filter ``queryset`` to the articles matching ``query``; every backend must implement this."""
+        raise NotImplementedError
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    """Index-less fallback for databases without a full-text engine."""
+    def search(self, queryset, query, fields=SEARCH_FIELDS, rank=True):
+        for term in parse_terms(query):
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f'contents__{field}__icontains': term})
+            queryset = queryset.filter(pk__in=Article.objects.filter(condition).values('pk'))
+        return queryset
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    FTS5 virtual table whose rowid is the ArticleContent id.
+
+    FTS5 has one tokenizer per table, so every language shares
+    ``unicode61`` with diacritics folded; titles weigh ten times the body in bm25.
+    """
+    table = 'article_content_fts'
+
+    def setup(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"title, body, language UNINDEXED, article_id UNINDEXED, "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(f"INSERT INTO {self.table}({self.table}, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+
+    def teardown(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, contents):
+        contents = list(contents)
+        if not contents:
+            return
+        self.remove([content.pk for content in contents])
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table}(rowid, title, body, language, article_id) VALUES (%s, %s, %s, %s, %s)",
+                [(c.pk, c.title, c.body, c.language, c.article_id) for c in contents],
+            )
+
+    def remove(self, content_ids):
+        content_ids = list(content_ids)
+        if not content_ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in content_ids])
+
+    def remove_all(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def build_query(self, terms, fields):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return f"{{{' '.join(fields)}}} : ({match})"
+
+    def search(self, queryset, query, fields=SEARCH_FIELDS, rank=True):
+        terms = parse_terms(query)
+        if not terms:
+            return queryset
+        match = self.build_query(terms, fields)
+        queryset = queryset.filter(
+            pk__in=RawSQL(f"SELECT article_id FROM {self.table} WHERE {self.table} MATCH %s", (match,)),
+        )
+        if not rank:
+            return queryset
+        return queryset.annotate(search_rank=RawSQL(
+            f"SELECT MIN(f.rank) FROM {ArticleContent._meta.db_table} c "
+            f"JOIN {self.table} f ON f.rowid = c.id "
+            f"WHERE c.article_id = {Article._meta.db_table}.id AND {self.table} MATCH %s",
+            (match,),
+            output_field=FloatField(),
+        ))
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    ``tsvector`` documents in a side table with a GIN index, stemmed with the
+    text search configuration of each row's language.
+    """
+    table = 'article_content_search'
+    configs = {'en': 'english', 'fr': 'french', 'ar': 'arabic'}
+    default_config = 'simple'
+
+    def setup(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                f"content_id bigint PRIMARY KEY, article_id bigint NOT NULL, "
+                f"config regconfig NOT NULL, document tsvector NOT NULL)"
+            )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_document ON {self.table} USING GIN (document)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_article ON {self.table} (article_id)")
+
+    def teardown(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def get_config(self, language):
+        return self.configs.get(language, self.default_config)
+
+    def index(self, contents):
+        contents = list(contents)
+        if not contents:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (content_id, article_id, config, document) "
+                f"VALUES (%s, %s, %s::regconfig, "
+                f"setweight(to_tsvector(%s::regconfig, %s), 'A') || setweight(to_tsvector(%s::regconfig, %s), 'B')) "
+                f"ON CONFLICT (content_id) DO UPDATE SET "
+                f"article_id = EXCLUDED.article_id, config = EXCLUDED.config, document = EXCLUDED.document",
+                [
+                    (c.pk, c.article_id, config, config, c.title, config, c.body)
+                    for c in contents
+                    for config in [self.get_config(c.language)]
+                ],
+            )
+
+    def remove(self, content_ids):
+        content_ids = list(content_ids)
+        if not content_ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE content_id = ANY(%s)", (content_ids,))
+
+    def remove_all(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table}")
+
+    def build_query(self, terms, fields):
+        weights = ''.join({'title': 'A', 'body': 'B'}[field] for field in fields)
+        text = ' & '.join(f'{term}:*{weights}' for term in terms)
+        # A constant tsquery (rather than one built from each row's config) lets the GIN index be used.
+        configs = sorted(set(self.configs.values()) | {self.default_config})
+        sql = ' || '.join(f"to_tsquery('{config}', %s)" for config in configs)
+        return f'({sql})', (text,) * len(configs)
+
+    def search(self, queryset, query, fields=SEARCH_FIELDS, rank=True):
+        terms = parse_terms(query)
+        if not terms:
+            return queryset
+        tsquery, params = self.build_query(terms, fields)
+        queryset = queryset.filter(
+            pk__in=RawSQL(f"SELECT article_id FROM {self.table} WHERE document @@ {tsquery}", params),
+        )
+        if not rank:
+            return queryset
+        return queryset.annotate(search_rank=RawSQL(
+            f"SELECT -MAX(ts_rank(document, {tsquery})) FROM {self.table} "
+            f"WHERE article_id = {Article._meta.db_table}.id",
+            params,
+            output_field=FloatField(),
+        ))
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(using=None):
+    """
+    Return the backend named by ``ARTICLE_SEARCH_BACKEND`` or the one matching
+    the database vendor, bound to ``using`` (an alias or a connection; the
+    default database when omitted).
+    """
+    if using is None or isinstance(using, str):
+        using = connections[using or DEFAULT_DB_ALIAS]
+    path = getattr(settings, 'ARTICLE_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)(using)
+    return VENDOR_BACKENDS.get(using.vendor, IContainsSearchBackend)(using)
@@ -1,15 +1,77 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Category, Tag, Article, ArticleContent, Comment
+from .models import EXCERPT_LENGTH, Category, Tag, Article, ArticleContent, Comment
+from .throttles import parse_rate
 
-class CategorySerializer(serializers.ModelSerializer):
+# Most names one bulk tag/category request may look up or create.
+MAX_BULK_NAMES = 100
+# Most comments one batch request may post; COMMENT_RATE_LIMIT may allow fewer.
+MAX_BATCH_COMMENTS = 100
+
+class UniqueNameMixin:
+    """Reject a name another row already has in any case (see ``NamedQuerySet``)."""
+    def validate_name(self, value):
+        rows = self.Meta.model.objects.matching([value])
+        if self.instance is not None:
+            rows = rows.exclude(pk=self.instance.pk)
+        if rows.exists():
+            raise serializers.ValidationError(f'{self.Meta.model._meta.verbose_name.capitalize()} with this name already exists.')
+        return value
+
+class CategorySerializer(UniqueNameMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'name', 'created_at']
+        fields = ['id', 'name', 'created_at', 'article_count']
+        read_only_fields = ['article_count']
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(UniqueNameMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
-        fields = ['id', 'name']
+        fields = ['id', 'name', 'article_count']
+        read_only_fields = ['article_count']
+
+class BulkNameSerializer(serializers.Serializer):
+    """``{"names": [...]}`` for the bulk endpoints of ``model`` (a Tag or Category)."""
+    def __init__(self, *args, model, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['names'] = serializers.ListField(
+            child=serializers.CharField(max_length=model._meta.get_field('name').max_length),
+            allow_empty=False, max_length=MAX_BULK_NAMES,
+        )
+
+class TagReferenceField(serializers.Field):
+    """
+    One tag, by primary key or by name. Integers and all-digit strings are
+    ids, as ``PrimaryKeyRelatedField`` accepted them; any other string is a
+    name, matched ignoring case.
+    """
+    default_error_messages = {
+        'invalid': 'Expected a tag id or name.',
+        'blank': 'Tag names may not be blank.',
+        'max_length': 'Ensure tag names have no more than {max_length} characters.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (int, str)):
+            self.fail('invalid')
+        if isinstance(data, int):
+            return data
+        name = data.strip()
+        if name.isascii() and name.isdigit():
+            return int(name)
+        if not name:
+            self.fail('blank')
+        max_length = Tag._meta.get_field('name').max_length
+        if len(name) > max_length:
+            self.fail('max_length', max_length=max_length)
+        return name
+
+class TagListField(serializers.ListField):
+    """Article tags as a mix of ids and names on input; always ids on output."""
+    child = TagReferenceField()
+
+    def to_representation(self, value):
+        return [tag.pk for tag in value.all()]
 
 class ArticleContentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -23,23 +85,105 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ['id', 'user', 'content', 'created_at']
 
+class CommentBatchItemSerializer(serializers.Serializer):
+    article = serializers.IntegerField()
+    content = serializers.CharField()
+
+class CommentBatchSerializer(serializers.Serializer):
+    """``{"comments": [{"article": id, "content": "..."}, ...]}``, checked against the database in one query."""
+    comments = CommentBatchItemSerializer(many=True, allow_empty=False, max_length=MAX_BATCH_COMMENTS)
+
+    def validate_comments(self, value):
+        limit, _ = parse_rate(settings.COMMENT_RATE_LIMIT)
+        if limit is not None and len(value) > limit:
+            raise serializers.ValidationError(
+                f'Ensure this field has no more than {limit} elements; '
+                f'the comment rate limit is {settings.COMMENT_RATE_LIMIT}.'
+            )
+        known = Article.objects.only('id').in_bulk({item['article'] for item in value})
+        errors = [
+            {} if item['article'] in known else {'article': [f'Invalid pk "{item["article"]}" - object does not exist.']}
+            for item in value
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return value
+
 class ArticleSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
     category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
-    tags = serializers.PrimaryKeyRelatedField(many=True, queryset=Tag.objects.all())
+    tags = TagListField()
     contents = ArticleContentSerializer(many=True)
     comments = CommentSerializer(many=True, read_only=True)
+    comments_count = serializers.IntegerField(source='comment_count', read_only=True)
 
     class Meta:
         model = Article
-        fields = ['id', 'author', 'category', 'tags', 'created_at', 'updated_at', 'contents','comments']
+        fields = ['id', 'author', 'category', 'tags', 'created_at', 'updated_at', 'contents','comments', 'comments_count']
+
+    def validate_tags(self, value):
+        ids = {tag for tag in value if isinstance(tag, int)}
+        known = set(Tag.objects.filter(pk__in=ids).values_list('pk', flat=True)) if ids else set()
+        missing = sorted(ids - known)
+        if missing:
+            raise serializers.ValidationError([f'Invalid pk "{pk}" - object does not exist.' for pk in missing])
+        return value
+
+    def resolve_tags(self, tags):
+        """Tag ids for validated ``tags``, creating named tags that do not exist yet in one INSERT."""
+        by_name = Tag.objects.resolve(tag for tag in tags if isinstance(tag, str))
+        return list(dict.fromkeys(by_name[tag].pk if isinstance(tag, str) else tag for tag in tags))
 
     def create(self, validated_data):
         contents_data = validated_data.pop('contents')
-        tags_data = validated_data.pop('tags')
+        tags_data = self.resolve_tags(validated_data.pop('tags'))
         article = Article.objects.create(**validated_data)
         for content_data in contents_data:
             ArticleContent.objects.create(article=article, **content_data)
         article.tags.set(tags_data)
         return article
-    
+
+    def update(self, instance, validated_data):
+        tags_data = validated_data.pop('tags', None)
+        article = super().update(instance, validated_data)
+        if tags_data is not None:
+            article.tags.set(self.resolve_tags(tags_data))
+        return article
+
+class ArticleListSerializer(serializers.ModelSerializer):
+    """Compact article row for list endpoints; bodies and comments are only served on retrieve."""
+    author = serializers.StringRelatedField(read_only=True)
+    tags = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    language = serializers.SerializerMethodField()
+    title = serializers.SerializerMethodField()
+    excerpt = serializers.SerializerMethodField()
+    comments_count = serializers.IntegerField(source='comment_count', read_only=True)
+
+    class Meta:
+        model = Article
+        fields = ['id', 'author', 'category', 'tags', 'created_at', 'updated_at', 'language', 'title', 'excerpt', 'comments_count']
+
+    def get_content(self, obj):
+        # ArticleQuerySet.for_list(languages=...) normally loads a single translation already.
+        contents = obj.contents.all()
+        for language in self.context.get('languages', []):
+            for content in contents:
+                if content.language == language:
+                    return content
+        return contents[0] if contents else None
+
+    def get_language(self, obj):
+        content = self.get_content(obj)
+        return content.language if content else None
+
+    def get_title(self, obj):
+        content = self.get_content(obj)
+        return content.title if content else None
+
+    def get_excerpt(self, obj):
+        content = self.get_content(obj)
+        if content is None:
+            return None
+        if len(content.excerpt) > EXCERPT_LENGTH:
+            return content.excerpt[:EXCERPT_LENGTH].rstrip() + '\u2026'
+        return content.excerpt
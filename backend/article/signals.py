@@ -0,0 +1,226 @@
+from django.db.models import DEFERRED
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate
+from .counters import adjust
+from .models import Article, ArticleContent, Category, Comment, Tag
+from .search import get_search_backend
+from .snapshots import schedule
+
+
+@receiver(post_save, sender=ArticleContent)
+def index_article_content(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    get_search_backend(using).index([instance])
+
+
+@receiver(post_delete, sender=ArticleContent)
+def unindex_article_content(sender, instance, using=None, **kwargs):
+    get_search_backend(using).remove([instance.pk])
+
+
+# Response cache invalidation. Article lists share the "articles" scope;
+# each detail payload has its own scope plus "article-details" for changes
+# that touch articles we cannot enumerate cheaply.
+
+@receiver([post_save, post_delete], sender=Article)
+def invalidate_article(sender, instance, **kwargs):
+    invalidate('articles', f'article:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=ArticleContent)
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_article_children(sender, instance, **kwargs):
+    invalidate('articles', f'article:{instance.article_id}')
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def invalidate_article_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate('articles', f'article:{instance.pk}')
+    elif pk_set:
+        invalidate('articles', *(f'article:{pk}' for pk in pk_set))
+    else:
+        invalidate('articles', 'article-details')
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_tag(sender, instance, **kwargs):
+    invalidate('tags')
+
+
+@receiver(post_save, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    invalidate('categories')
+
+
+# Deleting a tag or category rewrites article rows (tag links, category=NULL)
+# without sending per-article signals.
+
+@receiver(post_delete, sender=Tag)
+def invalidate_deleted_tag(sender, instance, **kwargs):
+    invalidate('tags', 'articles', 'article-details')
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_deleted_category(sender, instance, **kwargs):
+    invalidate('categories', 'articles', 'article-details')
+
+
+# Deleting an article cascades to its contents and comments, one post_delete
+# each, and there is nothing to update on a row that is going away. Every
+# signal of one delete() gets the same ``origin`` (the instance or queryset
+# it was called on), which carries the ids of the articles being deleted.
+
+@receiver(pre_delete, sender=Article)
+def remember_deleted_article(sender, instance, origin=None, **kwargs):
+    if origin is not None:
+        origin.__dict__.setdefault('_deleted_article_ids', set()).add(instance.pk)
+
+
+def parent_is_deleted(instance, origin):
+    return instance.article_id in getattr(origin, '_deleted_article_ids', ())
+
+
+# Keep Article.updated_at (the HTTP validator of article responses) moving
+# whenever anything embedded in the article payload changes.
+
+def touch_articles(**lookups):
+    Article.objects.filter(**lookups).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=ArticleContent)
+@receiver([post_save, post_delete], sender=Comment)
+def touch_parent_article(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or parent_is_deleted(instance, origin):
+        return
+    touch_articles(pk=instance.article_id)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def touch_tagged_articles(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            touch_articles(pk=instance.pk)
+    elif action == 'pre_clear':
+        touch_articles(tags=instance)
+    elif action in ('post_add', 'post_remove'):
+        touch_articles(pk__in=pk_set)
+
+
+@receiver(pre_delete, sender=Tag)
+def touch_articles_of_deleted_tag(sender, instance, **kwargs):
+    touch_articles(tags=instance)
+
+
+@receiver(pre_delete, sender=Category)
+def touch_articles_of_deleted_category(sender, instance, **kwargs):
+    touch_articles(category=instance)
+
+
+
+# Denormalized counters (see article.counters).
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust(Article, 'comment_count', {instance.article_id: 1})
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, origin=None, **kwargs):
+    if not parent_is_deleted(instance, origin):
+        adjust(Article, 'comment_count', {instance.article_id: -1})
+
+
+@receiver(pre_save, sender=Article)
+def remember_article_category(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    if getattr(instance, '_loaded_category_id', DEFERRED) is DEFERRED:
+        instance._loaded_category_id = Article.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+
+
+@receiver(post_save, sender=Article)
+def count_article_category(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else instance._loaded_category_id
+    if previous != instance.category_id:
+        adjust(Category, 'article_count', {previous: -1, instance.category_id: 1})
+        invalidate('categories')
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(pre_delete, sender=Article)
+def count_deleted_article(sender, instance, **kwargs):
+    # The tag links go with the article without m2m_changed, so count them now.
+    tag_ids = Article.tags.through.objects.filter(article_id=instance.pk).values_list('tag_id', flat=True)
+    adjust(Tag, 'article_count', dict.fromkeys(tag_ids, -1))
+    adjust(Category, 'article_count', {instance.category_id: -1})
+    invalidate('tags', 'categories')
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def count_tagged_articles(sender, instance, action, reverse, pk_set, **kwargs):
+    # Keyed on the tag side of each link, whichever side the change came from.
+    if action in ('pre_remove', 'pre_clear'):
+        # Removing a link that does not exist is a no-op, so note which ones do.
+        links = sender.objects.filter(**{'tag_id' if reverse else 'article_id': instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(**{'article_id__in' if reverse else 'tag_id__in': pk_set})
+        instance._removed_links = list(links.values_list('article_id' if reverse else 'tag_id', flat=True))
+        return
+    if action == 'post_add':
+        linked, amount = pk_set or (), 1
+    elif action in ('post_remove', 'post_clear'):
+        linked, amount = instance.__dict__.pop('_removed_links', ()), -1
+    else:
+        return
+    if not linked:
+        return
+    adjust(Tag, 'article_count', {instance.pk: amount * len(linked)} if reverse else dict.fromkeys(linked, amount))
+    invalidate('tags')
+
+
+# Materialized detail responses (see article.snapshots). Deleted articles
+# take their snapshots with them through the foreign key.
+
+@receiver(post_save, sender=Article)
+def refresh_article_snapshots(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=ArticleContent)
+@receiver([post_save, post_delete], sender=Comment)
+def refresh_parent_snapshots(sender, instance, raw=False, origin=None, **kwargs):
+    if not raw and not parent_is_deleted(instance, origin):
+        schedule([instance.article_id])
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def refresh_tagged_snapshots(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            schedule([instance.pk])
+    elif action == 'pre_clear':
+        schedule(Article.objects.filter(tags=instance).values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        schedule(pk_set)
+
+
+@receiver(pre_delete, sender=Tag)
+def refresh_snapshots_of_deleted_tag(sender, instance, **kwargs):
+    schedule(Article.objects.filter(tags=instance).values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+def refresh_snapshots_of_deleted_category(sender, instance, **kwargs):
+    schedule(Article.objects.filter(category=instance).values_list('pk', flat=True))
+
@@ -0,0 +1,150 @@
+"""
+Materialized article detail responses.
+
+For every article, ``ArticleSnapshot`` holds the JSON that
+``ArticleViewSet.retrieve`` would render: one row per translation (what a
+client with a language preference gets) and one ``all`` row (no
+preference). ``article.signals`` schedules ``refresh`` for the articles a
+transaction touched, once it commits; ``rebuild_snapshots`` regenerates
+everything. ``SnapshotResponseMixin`` then answers anonymous JSON reads
+with the stored bytes, without loading or serializing the article.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, OuterRef, Subquery, Value, When
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from .languages import get_language_chain
+from .models import Article, ArticleSnapshot
+from .serializers import ArticleSerializer
+
+ALL_LANGUAGES = 'all'
+
+logger = logging.getLogger(__name__)
+
+_pending = threading.local()
+
+
+def render_snapshots(article, rendered_at):
+    """Unsaved snapshots of ``article``, loaded with every translation by ``with_related``."""
+    data = ArticleSerializer(article).data
+    # The renderer regular JSON responses would have used, so the bytes match.
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    snapshots = [ArticleSnapshot(article=article, language=ALL_LANGUAGES, body=renderer.render(data), rendered_at=rendered_at)]
+    for content in data['contents']:
+        # Exactly what with_related(languages=[code]) would have loaded.
+        snapshots.append(ArticleSnapshot(
+            article=article, language=content['language'], position=content['id'],
+            body=renderer.render({**data, 'contents': [content]}), rendered_at=rendered_at,
+        ))
+    return snapshots
+
+
+def store(snapshots, article_ids):
+    """
+    Write ``snapshots`` of ``article_ids`` and drop the rows they supersede.
+
+    Refreshes of one article can overlap, and the one that read it first
+    may finish last. Each row therefore only replaces one rendered earlier,
+    and whatever is older than an article's newest rendering (a removed
+    translation, or a late write of one) is deleted, so the latest read wins
+    whatever the order of the writes.
+    """
+    table = connection.ops.quote_name(ArticleSnapshot._meta.db_table)
+    fields = [ArticleSnapshot._meta.get_field(name) for name in ('article', 'language', 'position', 'body', 'rendered_at')]
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    rows = [[field.get_db_prep_save(getattr(snapshot, field.attname), connection) for field in fields] for snapshot in snapshots]
+    latest = ArticleSnapshot.objects.filter(article_id=OuterRef('article_id')).order_by('-rendered_at').values('rendered_at')[:1]
+    with transaction.atomic():
+        if rows:
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['%s'] * len(fields))}) "
+                    f"ON CONFLICT (article_id, language) DO UPDATE SET "
+                    f"position = excluded.position, body = excluded.body, rendered_at = excluded.rendered_at "
+                    f"WHERE {table}.rendered_at < excluded.rendered_at",
+                    rows,
+                )
+        ArticleSnapshot.objects.filter(article_id__in=article_ids, rendered_at__lt=Subquery(latest)).delete()
+    return len(rows)
+
+
+def refresh(article_ids):
+    """Re-render the snapshots of ``article_ids``; returns how many were written."""
+    # Taken before reading, so it orders refreshes by what they saw.
+    rendered_at = timezone.now()
+    articles = Article.objects.with_related(comments_limit=settings.ARTICLE_INLINE_COMMENTS).filter(pk__in=article_ids)
+    return store([snapshot for article in articles for snapshot in render_snapshots(article, rendered_at)], article_ids)
+
+
+def flush():
+    ids = getattr(_pending, 'ids', None)
+    _pending.ids = set()
+    if not ids:
+        return
+    try:
+        refresh(ids)
+    except DatabaseError:
+        logger.warning('Could not refresh the snapshots of articles %s', sorted(ids), exc_info=True)
+        # Rather than serve the old bodies until the next write, let the regular view answer.
+        ArticleSnapshot.objects.filter(article_id__in=ids).delete()
+
+
+def schedule(article_ids):
+    """
+    Refresh ``article_ids`` once the current transaction commits. Ids from
+    one transaction are collected and rendered together, by whichever of its
+    callbacks runs first; the others find nothing left to do.
+    """
+    if not settings.ARTICLE_SNAPSHOTS:
+        return
+    if not hasattr(_pending, 'ids'):
+        _pending.ids = set()
+    _pending.ids.update(article_ids)
+    # The write has committed by then; a failure here must not turn it into an error response.
+    transaction.on_commit(flush, robust=True)
+
+
+def get_snapshot(article_id, languages):
+    """The stored body for ``article_id`` as ``with_related(languages=...)`` would render it, or None."""
+    snapshots = ArticleSnapshot.objects.filter(article_id=article_id)
+    if languages:
+        rank = Case(
+            *[When(language=code, then=Value(i)) for i, code in enumerate(languages)],
+            default=Value(len(languages)),
+        )
+        snapshots = snapshots.exclude(language=ALL_LANGUAGES).order_by(rank, 'position')
+    else:
+        snapshots = snapshots.filter(language=ALL_LANGUAGES)
+    body = snapshots.values_list('body', flat=True).first()
+    return None if body is None else bytes(body)
+
+
+class SnapshotResponseMixin:
+    """
+    Serve ``retrieve`` from ``ArticleSnapshot`` for anonymous clients that
+    negotiated plain JSON; anything else, or a missing snapshot, falls
+    through to the regular view.
+    """
+    def should_serve_snapshot(self, request):
+        return (
+            settings.ARTICLE_SNAPSHOTS
+            and not request.user.is_authenticated
+            and request.accepted_media_type == JSONRenderer.media_type
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.should_serve_snapshot(request):
+            try:
+                body = get_snapshot(self.kwargs[self.lookup_field], get_language_chain(request))
+            except (TypeError, ValueError):
+                body = None
+            if body is not None:
+                return HttpResponse(body, content_type=JSONRenderer.media_type)
+        return super().retrieve(request, *args, **kwargs)
@@ -1,3 +1,1153 @@
-from django.test import TestCase
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import skipUnless
+from uuid import UUID
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from account.tokens import UserRefreshToken
+from backend.metrics import QueryRecorder, registry
+from backend.middleware import brotli, choose_encoding, compressed_cache_key, is_json
+from backend.renderers import ORJSONParser, ORJSONRenderer
+
+from .benchmark import run_benchmark, seed
+from .cache import get_cache
+from .counters import reconcile
+from .models import Category, Tag, Article, ArticleContent, ArticleSnapshot, Comment
+from .search import get_search_backend
+from .snapshots import render_snapshots, store
+from .serializers import TagSerializer
+from .throttles import CommentRateThrottle, parse_rate
+from .views import ArticleManagerViewSet
+
+User = get_user_model()
+
+
+def create_articles(author, count, category=None, tags=(), languages=('en', 'fr'), comments=2):
+    articles = Article.objects.bulk_create(
+        [Article(author=author, category=category) for _ in range(count)]
+    )
+    ArticleContent.objects.bulk_create([
+        ArticleContent(article=article, language=language, title=f"Title {article.pk} {language}", body="Body " * 60)
+        for article in articles
+        for language in languages
+    ])
+    Comment.objects.bulk_create([
+        Comment(article=article, user=author, content=f"Comment {i}")
+        for article in articles
+        for i in range(comments)
+    ])
+    Article.tags.through.objects.bulk_create([
+        Article.tags.through(article_id=article.pk, tag_id=tag.pk)
+        for article in articles
+        for tag in tags
+    ])
+    reconcile()
+    return articles
+
+
+class ArticleAPITestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+
+
+class ArticleQueryCountTests(ArticleAPITestCase):
+    # validators, articles + author join + comments count, tags, contents
+    LIST_QUERIES = 4
+    # validators, article + author join, tags, contents, comments + user join
+    DETAIL_QUERIES = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', email='writer@example.com', password='secret-pass')
+        cls.category = Category.objects.create(name='News')
+        cls.tags = [Tag.objects.create(name=f'tag{i}') for i in range(3)]
+
+    def assertListQueries(self, count):
+        create_articles(self.user, count, category=self.category, tags=self.tags)
+        with self.assertNumQueries(self.LIST_QUERIES):
+            response = self.client.get('/articles/articles/')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_single_article(self):
+        self.assertListQueries(1)
+
+    def test_list_many_articles(self):
+        self.assertListQueries(500)
+
+    def test_list_representation(self):
+        article = create_articles(self.user, 1, category=self.category, tags=self.tags, comments=3)[0]
+        response = self.client.get('/articles/articles/', {'lang': 'fr'})
+        row = response.data['results'][0]
+        self.assertEqual(row['id'], article.pk)
+        self.assertEqual(row['language'], 'fr')
+        self.assertEqual(row['title'], f'Title {article.pk} fr')
+        self.assertEqual(row['comments_count'], 3)
+        self.assertTrue(row['excerpt'].endswith('\u2026'))
+        self.assertEqual(len(row['excerpt']), 200)
+        self.assertNotIn('contents', row)
+        self.assertNotIn('comments', row)
+
+    def test_retrieve(self):
+        article = create_articles(self.user, 1, category=self.category, tags=self.tags)[0]
+        # Plus the snapshot lookup, which misses: bulk-created articles have none.
+        with self.assertNumQueries(self.DETAIL_QUERIES + 1):
+            response = self.client.get(f'/articles/articles/{article.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['author'], self.user.email)
+        self.assertEqual(sorted(response.data['tags']), sorted(tag.pk for tag in self.tags))
+        self.assertEqual(len(response.data['contents']), 2)
+        self.assertEqual(response.data['comments'][0]['user'], self.user.email)
+
+    def test_manager_retrieve(self):
+        article = create_articles(self.user, 1, category=self.category, tags=self.tags)[0]
+        request = APIRequestFactory().get('/articles/article-manager/')
+        force_authenticate(request, user=self.user)
+        view = ArticleManagerViewSet.as_view({'get': 'retrieve'})
+        with self.assertNumQueries(self.DETAIL_QUERIES - 1):
+            response = view(request, pk=article.pk)
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_list(self):
+        create_articles(self.user, 5, comments=4)
+        # One page of comments with their users joined in.
+        with self.assertNumQueries(1):
+            response = self.client.get('/articles/comments/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['user'] for row in response.data['results']}, {self.user.email})
+
+
+class KeysetPaginationTests(ArticleAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', email='writer@example.com', password='secret-pass')
+        cls.articles = create_articles(cls.user, 7, comments=0)
+
+    def walk(self, url, params):
+        seen = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                return seen, response
+            response = self.client.get(response.data['next'])
+
+    def test_pages_cover_every_article_once(self):
+        seen, _ = self.walk('/articles/articles/', {'page_size': 3})
+        self.assertEqual(seen, sorted((a.pk for a in self.articles), reverse=True))
+
+    def test_ordering_param(self):
+        seen, _ = self.walk('/articles/articles/', {'page_size': 2, 'ordering': 'created_at'})
+        self.assertEqual(seen, sorted(a.pk for a in self.articles))
+
+    def test_previous_link(self):
+        first = self.client.get('/articles/articles/', {'page_size': 3})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_stable_under_inserts(self):
+        first = self.client.get('/articles/articles/', {'page_size': 3})
+        create_articles(self.user, 2, comments=0)
+        second = self.client.get(first.data['next'])
+        expected = sorted((a.pk for a in self.articles), reverse=True)[3:6]
+        self.assertEqual([item['id'] for item in second.data['results']], expected)
+
+    def test_page_size_is_capped(self):
+        create_articles(self.user, 150, comments=0)
+        response = self.client.get('/articles/articles/', {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/articles/articles/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_contents_paginated_by_id(self):
+        seen, _ = self.walk('/articles/article-contents/', {'page_size': 4})
+        self.assertEqual(seen, list(ArticleContent.objects.order_by('id').values_list('id', flat=True)))
+
+
+class FullTextSearchTests(ArticleAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', email='writer@example.com', password='secret-pass')
+        cls.in_title = Article.objects.create(author=cls.user)
+        ArticleContent.objects.create(article=cls.in_title, language='en', title='Gardening basics', body='Soil and water.')
+        cls.in_body = Article.objects.create(author=cls.user)
+        ArticleContent.objects.create(article=cls.in_body, language='en', title='Weekend notes', body='Some gardening tips.')
+        cls.french = Article.objects.create(author=cls.user)
+        ArticleContent.objects.create(article=cls.french, language='fr', title='Café crème', body='Une recette.')
+
+    def search(self, **params):
+        response = self.client.get('/articles/articles/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search(search='gardening'), [self.in_title.pk, self.in_body.pk])
+
+    def test_ranked_results_paginate(self):
+        first = self.client.get('/articles/articles/', {'search': 'gardening', 'page_size': 1})
+        second = self.client.get(first.data['next'])
+        self.assertEqual([first.data['results'][0]['id'], second.data['results'][0]['id']], [self.in_title.pk, self.in_body.pk])
+        self.assertIsNone(second.data['next'])
+
+    def test_prefix_query(self):
+        self.assertEqual(self.search(search='garden'), [self.in_title.pk, self.in_body.pk])
+
+    def test_diacritics_are_folded(self):
+        self.assertEqual(self.search(search='cafe'), [self.french.pk])
+
+    def test_keyword_matches_titles_only(self):
+        self.assertEqual(self.search(keyword='gardening'), [self.in_title.pk])
+
+    def test_index_follows_saves_and_deletes(self):
+        content = self.in_body.contents.get()
+        content.body = 'Nothing here.'
+        with self.captureOnCommitCallbacks(execute=True):
+            content.save()
+        self.assertEqual(self.search(search='gardening'), [self.in_title.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.in_title.delete()
+        self.assertEqual(self.search(search='gardening'), [])
+
+
+class ResponseCacheTests(ArticleAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', email='writer@example.com', password='secret-pass')
+        cls.tag = Tag.objects.create(name='python')
+        cls.article = create_articles(cls.user, 1, tags=[cls.tag], comments=1)[0]
+
+    def test_anonymous_reads_are_cached(self):
+        self.client.get('/articles/articles/')
+        self.client.get(f'/articles/articles/{self.article.pk}/')
+        # Only the ETag/Last-Modified lookups (and the detail snapshot lookup) reach the database.
+        with self.assertNumQueries(3):
+            self.client.get('/articles/articles/')
+            response = self.client.get(f'/articles/articles/{self.article.pk}/')
+        self.assertEqual(response.data['id'], self.article.pk)
+
+    def test_query_params_are_part_of_the_key(self):
+        self.client.get('/articles/articles/', {'lang': 'en'})
+        response = self.client.get('/articles/articles/', {'lang': 'fr'})
+        self.assertEqual(response.data['results'][0]['language'], 'fr')
+
+    def test_unlocalized_views_share_entries_across_languages(self):
+        self.client.get('/articles/tags/', HTTP_ACCEPT_LANGUAGE='en')
+        with self.assertNumQueries(0):
+            response = self.client.get('/articles/tags/', HTTP_ACCEPT_LANGUAGE='fr')
+        self.assertEqual([tag['name'] for tag in response.data], ['python'])
+
+    def test_authenticated_reads_bypass_cache(self):
+        self.client.force_authenticate(self.user)
+        self.client.get('/articles/articles/')
+        with self.assertNumQueries(ArticleQueryCountTests.LIST_QUERIES):
+            self.client.get('/articles/articles/')
+
+    def test_comment_write_invalidates_article(self):
+        self.client.get('/articles/articles/')
+        self.client.get(f'/articles/articles/{self.article.pk}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(article=self.article, user=self.user, content='New')
+        listing = self.client.get('/articles/articles/')
+        detail = self.client.get(f'/articles/articles/{self.article.pk}/')
+        self.assertEqual(listing.data['results'][0]['comments_count'], 2)
+        self.assertEqual(len(detail.json()['comments']), 2)
+
+    def test_tag_changes_invalidate(self):
+        self.client.get('/articles/tags/')
+        self.client.get(f'/articles/articles/{self.article.pk}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Tag.objects.create(name='django')
+            self.article.tags.add(other)
+        self.assertEqual(len(self.client.get('/articles/tags/').data), 2)
+        self.assertEqual(sorted(self.client.get(f'/articles/articles/{self.article.pk}/').json()['tags']), [self.tag.pk, other.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+        self.assertEqual(self.client.get(f'/articles/articles/{self.article.pk}/').json()['tags'], [other.pk])
+        self.assertEqual([t['id'] for t in self.client.get('/articles/tags/').data], [other.pk])
+
+
+class ConditionalRequestTests(ArticleAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', email='writer@example.com', password='secret-pass')
+        cls.article = create_articles(cls.user, 1, comments=0)[0]
+
+    def test_detail_not_modified(self):
+        url = f'/articles/articles/{self.article.pk}/'
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        cached = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_list_not_modified(self):
+        response = self.client.get('/articles/articles/')
+        self.assertEqual(self.client.get('/articles/articles/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        other = self.client.get('/articles/articles/', {'lang': 'fr'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(other.status_code, 200)
+
+    def test_child_writes_change_validators(self):
+        url = f'/articles/articles/{self.article.pk}/'
+        etag = self.client.get(url)['ETag']
+        list_etag = self.client.get('/articles/articles/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(article=self.article, user=self.user, content='First!')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['comments']), 1)
+        self.assertEqual(self.client.get('/articles/articles/', HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.tags.add(Tag.objects.create(name='new'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_deleting_article_does_not_touch_it(self):
+        other = create_articles(self.user, 1, comments=3)[0]
+        with CaptureQueriesContext(connection) as queries:
+            Article.objects.filter(pk=other.pk).delete()
+        self.assertFalse([query for query in queries if '"updated_at"' in query['sql'] and query['sql'].startswith('UPDATE')])
+        # Children deleted on their own still move the validator.
+        before = Article.objects.values_list('updated_at', flat=True).get(pk=self.article.pk)
+        ArticleContent.objects.filter(article=self.article, language='fr').delete()
+        self.assertGreater(Article.objects.values_list('updated_at', flat=True).get(pk=self.article.pk), before)
+
+
+
+class BulkImportExportTests(ArticleAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', password='secret-pass', is_staff=True)
+        cls.category = Category.objects.create(name='News')
+        cls.tags = [Tag.objects.create(name=f'tag{i}') for i in range(2)]
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.admin)
+
+    def record(self, **overrides):
+        record = {
+            'category': self.category.pk,
+            'tags': [tag.pk for tag in self.tags],
+            'contents': [
+                {'language': 'en', 'title': 'Hello', 'body': 'Searchable body'},
+                {'language': 'fr', 'title': 'Bonjour', 'body': 'Corps'},
+            ],
+        }
+        record.update(overrides)
+        return json.dumps(record)
+
+    def post(self, lines):
+        return self.client.generic('POST', '/articles/articles/import/', '\n'.join(lines), content_type='application/x-ndjson')
+
+    def test_import_uses_one_insert_per_table(self):
+        lines = [self.record() for _ in range(50)]
+        # category and tag lookups, savepoint, three bulk inserts, search index delete + insert,
+        # category and tag counters, release
+        with self.assertNumQueries(11):
+            response = self.post(lines)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'created': 50, 'errors': []})
+        self.assertEqual(Article.objects.count(), 50)
+        self.assertEqual(ArticleContent.objects.count(), 100)
+        self.assertEqual(Article.tags.through.objects.count(), 100)
+        found = self.client.get('/articles/articles/', {'search': 'searchable', 'page_size': 100}).data['results']
+        self.assertEqual(len(found), 50)
+
+    def test_invalid_lines_are_reported(self):
+        response = self.post([
+            self.record(),
+            '{not json',
+            self.record(tags=[999]),
+            self.record(contents=[{'language': 'en', 'title': 'a', 'body': 'b'}] * 2),
+        ])
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([error['line'] for error in response.data['errors']], [2, 4, 3])
+
+    def test_tags_by_id_or_name(self):
+        response = self.post([
+            self.record(tags=[self.tags[0].pk, 'TAG1', 'rust']),
+            self.record(tags=['Rust', str(self.tags[0].pk)]),
+            self.record(tags=['go', 999]),
+        ])
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['line'] for error in response.data['errors']], [3])
+        rust = Tag.objects.get(name='rust')
+        first, second = Article.objects.order_by('pk')
+        self.assertEqual(set(first.tags.all()), {*self.tags, rust})
+        self.assertEqual(set(second.tags.all()), {self.tags[0], rust})
+        # Lines that fail validation create nothing.
+        self.assertFalse(Tag.objects.filter(name='go').exists())
+        self.assertEqual(Tag.objects.get(pk=rust.pk).article_count, 2)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.post([self.record()]).status_code, 401)
+
+    def test_export_round_trips(self):
+        self.post([self.record(), self.record(tags=[])])
+        response = self.client.get('/articles/articles/export/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['author'], self.admin.email)
+        self.assertEqual(sorted(records[0]['tags']), [tag.pk for tag in self.tags])
+        self.assertEqual(records[1]['contents'][1]['title'], 'Bonjour')
+
+        Article.objects.all().delete()
+        lines = [json.dumps({key: record[key] for key in ('category', 'tags', 'contents')}) for record in records]
+        self.assertEqual(self.post(lines).data['created'], 2)
+
+
+class ArticleCommentThreadTests(ArticleAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', email='writer@example.com', password='secret-pass')
+        cls.article, cls.other = create_articles(cls.user, 2, comments=0)
+        Comment.objects.bulk_create([Comment(article=cls.article, user=cls.user, content=f'Comment {i}') for i in range(7)])
+        reconcile()
+        Comment.objects.create(article=cls.other, user=cls.user, content='Elsewhere')
+
+    def test_thread_is_paginated(self):
+        url = f'/articles/articles/{self.article.pk}/comments/'
+        seen = []
+        response = self.client.get(url, {'page_size': 3})
+        while True:
+            seen.extend(comment['content'] for comment in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, [f'Comment {i}' for i in reversed(range(7))])
+
+    def test_thread_ordering(self):
+        response = self.client.get(f'/articles/articles/{self.article.pk}/comments/', {'ordering': 'created_at'})
+        self.assertEqual(response.data['results'][0]['content'], 'Comment 0')
+
+    def test_unknown_article(self):
+        self.assertEqual(self.client.get('/articles/articles/999/comments/').status_code, 404)
+
+    @override_settings(ARTICLE_INLINE_COMMENTS=2)
+    def test_inline_comments_are_capped(self):
+        response = self.client.get(f'/articles/articles/{self.article.pk}/')
+        self.assertEqual([c['content'] for c in response.data['comments']], ['Comment 6', 'Comment 5'])
+        self.assertEqual(response.data['comments_count'], 7)
+
+
+class LanguageNegotiationTests(ArticleAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', email='writer@example.com', password='secret-pass')
+        cls.article = create_articles(cls.user, 1, languages=('fr', 'en', 'ar'), comments=0)[0]
+        cls.french_only = create_articles(cls.user, 1, languages=('fr',), comments=0)[0]
+
+    def detail(self, **extra):
+        return self.client.get(f'/articles/articles/{self.article.pk}/', **extra)
+
+    def test_lang_param_selects_one_translation(self):
+        response = self.detail(data={'lang': 'ar'})
+        self.assertEqual([c['language'] for c in response.data['contents']], ['ar'])
+
+    def test_accept_language_fallback_chain(self):
+        response = self.detail(HTTP_ACCEPT_LANGUAGE='de-DE, ar;q=0.8, fr;q=0.5')
+        self.assertEqual([c['language'] for c in response.data['contents']], ['ar'])
+        response = self.detail(HTTP_ACCEPT_LANGUAGE='de-DE')
+        self.assertEqual([c['language'] for c in response.data['contents']], ['en'])
+        self.assertIn('Accept-Language', response['Vary'])
+
+    def test_all_translations_without_preference(self):
+        self.assertEqual(len(self.detail().data['contents']), 3)
+        self.assertEqual(len(self.detail(data={'lang': 'all'}, HTTP_ACCEPT_LANGUAGE='fr').data['contents']), 3)
+
+    def test_list_loads_one_translation_per_article(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/articles/articles/', HTTP_ACCEPT_LANGUAGE='ar')
+        rows = {row['id']: row['language'] for row in response.data['results']}
+        # Articles without the preferred translation fall back to what they have.
+        self.assertEqual(rows, {self.article.pk: 'ar', self.french_only.pk: 'fr'})
+        content_query = next(q['sql'] for q in queries if q['sql'].startswith('SELECT "article_articlecontent"'))
+        self.assertIn('LIMIT 1', content_query)
+
+    def test_cache_and_etag_follow_negotiation(self):
+        first = self.client.get('/articles/articles/', HTTP_ACCEPT_LANGUAGE='de, ar')
+        second = self.client.get('/articles/articles/', HTTP_ACCEPT_LANGUAGE='de, fr', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['results'][-1]['language'], 'fr')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BenchmarkSuiteTests(ArticleAPITestCase):
+    def test_every_route_runs_without_server_errors(self):
+        # Sampled requests are logged by the metrics middleware; keep them out of the test output.
+        logger = logging.getLogger('backend.requests')
+        self.addCleanup(setattr, logger, 'disabled', logger.disabled)
+        logger.disabled = True
+        data = seed(users=3, articles=5, comments=10, tags=3, categories=2)
+        results = run_benchmark(data, requests=2, warmup=0)
+        self.assertGreater(len(results), 30)
+        for result in results:
+            self.assertEqual(result['requests'], 2, result['name'])
+            self.assertTrue(all(int(code) < 500 for code in result['status']), result)
+            if result['method'] == 'GET':
+                self.assertNotIn('404', result['status'], result['name'])
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertIsNotNone(result['queries_per_request'])
+
+
+@override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+class RequestMetricsTests(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='password')
+        create_articles(self.user, 3)
+
+    def test_sampled_request_reports_timing_and_is_aggregated(self):
+        with self.assertLogs('backend.requests', 'INFO') as logs:
+            response = self.client.get('/articles/articles/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+, total;dur=[\d.]+$')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'article-list')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['duplicates'], [])
+        self.assertEqual(registry.snapshot()['article-list']['requests'], 1)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_request_is_untouched(self):
+        response = self.client.get('/articles/articles/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(registry.snapshot(), {})
+
+    def test_repeated_sql_is_reported(self):
+        recorder = QueryRecorder()
+        users = [User.objects.create_user(username=f'u{i}', email=f'u{i}@example.com', password='p') for i in range(3)]
+        with connection.execute_wrapper(recorder):
+            for user in users:
+                User.objects.get(pk=user.pk)
+        [(sql, count)] = recorder.duplicates(3)
+        self.assertIn('account_customuser', sql)
+        self.assertEqual(count, 3)
+
+    def test_histogram_endpoint_is_admin_only(self):
+        self.client.get('/articles/tags/')
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/metrics/requests/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/metrics/requests/')
+        self.assertEqual(response.status_code, 200)
+        tags = response.data['views']['tag-list']
+        self.assertEqual(tags['requests'], 1)
+        self.assertEqual(sum(tags['histogram_ms'].values()), 1)
+
+
+class AsyncReadViewTests(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='password')
+        self.category = Category.objects.create(name='News')
+        self.tag = Tag.objects.create(name='python')
+        self.articles = create_articles(self.user, 3, category=self.category, tags=[self.tag], comments=3)
+
+    async def assertSameAsSync(self, sync_path, async_path, **extra):
+        sync_response = await sync_to_async(self.client.get)(sync_path, **extra)
+        async_response = await self.async_client.get(async_path, **extra)
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+
+    async def test_matches_sync_endpoints(self):
+        article = self.articles[0].pk
+        await self.assertSameAsSync('/articles/categories/', '/articles/async/categories/')
+        await self.assertSameAsSync(f'/articles/categories/{self.category.pk}/', f'/articles/async/categories/{self.category.pk}/')
+        await self.assertSameAsSync('/articles/tags/', '/articles/async/tags/')
+        await self.assertSameAsSync(f'/articles/tags/{self.tag.pk}/', f'/articles/async/tags/{self.tag.pk}/')
+        await self.assertSameAsSync(f'/articles/articles/{article}/', f'/articles/async/articles/{article}/')
+        await self.assertSameAsSync(f'/articles/articles/{article}/', f'/articles/async/articles/{article}/', headers={'Accept-Language': 'fr'})
+
+    async def test_article_list_filters_and_paginates_like_sync(self):
+        response = await self.async_client.get('/articles/async/articles/', {'page_size': 2, 'tags': self.tag.pk, 'lang': 'fr'})
+        data = json.loads(response.content)
+        self.assertEqual([row['id'] for row in data['results']], [a.pk for a in reversed(self.articles)][:2])
+        self.assertEqual(data['results'][0]['language'], 'fr')
+        self.assertIn('Accept-Language', response['Vary'])
+        page = await self.async_client.get(data['next'])
+        self.assertEqual([row['id'] for row in json.loads(page.content)['results']], [self.articles[0].pk])
+
+    async def test_errors(self):
+        self.assertEqual((await self.async_client.get('/articles/async/articles/999/')).status_code, 404)
+        self.assertEqual((await self.async_client.get('/articles/async/articles/', {'cursor': 'bogus'})).status_code, 404)
+        self.assertEqual((await self.async_client.post('/articles/async/tags/')).status_code, 405)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+    async def test_request_metrics_in_async_stack(self):
+        # Both async views and sync views run through the async stack.
+        for path in ('/articles/async/articles/', '/articles/comments/'):
+            with self.assertLogs('backend.requests', 'INFO') as logs:
+                response = await self.async_client.get(path)
+            queries = json.loads(logs.records[0].getMessage())['queries']
+            self.assertGreater(queries, 0, path)
+            self.assertIn(f'desc="{queries} queries"', response['Server-Timing'])
+
+
+class CounterTests(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='password')
+        self.news, self.sport = Category.objects.create(name='News'), Category.objects.create(name='Sport')
+        self.python, self.django = Tag.objects.create(name='python'), Tag.objects.create(name='django')
+
+    def assertCounts(self, article=None, **expected):
+        for name, count in expected.items():
+            obj = getattr(self, name)
+            obj.refresh_from_db()
+            field = 'comment_count' if isinstance(obj, Article) else 'article_count'
+            self.assertEqual(getattr(obj, field), count, name)
+
+    def test_article_lifecycle(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/articles/articles/', {
+            'category': self.news.pk, 'tags': [self.python.pk, self.django.pk],
+            'contents': [{'language': 'en', 'title': 'Hello', 'body': 'World'}],
+        }, format='json')
+        self.article = Article.objects.get(pk=response.data['id'])
+        self.assertCounts(news=1, sport=0, python=1, django=1)
+
+        self.client.patch(f'/articles/articles/{self.article.pk}/', {'category': self.sport.pk, 'tags': [self.django.pk]}, format='json')
+        self.assertCounts(news=0, sport=1, python=0, django=1)
+
+        Comment.objects.create(article=self.article, user=self.user, content='First')
+        comment = Comment.objects.create(article=self.article, user=self.user, content='Second')
+        comment.delete()
+        self.assertCounts(article=1)
+        self.assertEqual(self.client.get(f'/articles/articles/{self.article.pk}/').data['comments_count'], 1)
+
+        self.client.delete(f'/articles/articles/{self.article.pk}/')
+        self.assertCounts(sport=0, django=0)
+
+    def test_deleting_article_skips_its_comment_counter(self):
+        self.article = create_articles(self.user, 1, comments=50)[0]
+        # Collecting the children, the tag counters, one DELETE per table and
+        # one search index removal per translation; nothing per comment.
+        with self.assertNumQueries(10):
+            self.article.delete()
+        self.assertFalse(Comment.objects.exists())
+
+    def test_m2m_changes_from_either_side(self):
+        self.article = create_articles(self.user, 1, comments=0)[0]
+        self.article.tags.add(self.python, self.django)
+        self.article.tags.add(self.python)
+        self.assertCounts(python=1, django=1)
+        self.article.tags.remove(self.python, self.python)
+        self.article.tags.remove(self.python)
+        self.assertCounts(python=0, django=1)
+        self.python.article_set.add(self.article)
+        self.assertCounts(python=1)
+        self.article.tags.clear()
+        self.assertCounts(python=0, django=0)
+        self.django.article_set.add(self.article)
+        self.django.article_set.clear()
+        self.assertCounts(django=0)
+
+    def test_reconcile_command_fixes_drift(self):
+        create_articles(self.user, 3, category=self.news, tags=[self.python], comments=2)
+        Article.objects.update(comment_count=0)
+        Tag.objects.update(article_count=9)
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertEqual(out.getvalue().split('\n')[:3], ['Corrected 3 articles.', 'Corrected 2 tags.', 'Corrected 0 categories.'])
+        self.assertCounts(news=3, python=3, django=0)
+        self.assertEqual(set(Article.objects.values_list('comment_count', flat=True)), {2})
+
+    def test_tag_cloud_is_ordered_by_count(self):
+        create_articles(self.user, 2, tags=[self.django], comments=0)
+        response = self.client.get('/articles/tags/', {'ordering': '-article_count'})
+        self.assertEqual([(tag['name'], tag['article_count']) for tag in response.data], [('django', 2), ('python', 0)])
+
+
+
+class BulkNameTests(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='password')
+        self.python = Tag.objects.create(name='python')
+
+    def test_bulk_get_or_create(self):
+        self.client.force_authenticate(self.user)
+        # INSERT ... ON CONFLICT DO NOTHING, SELECT
+        with self.assertNumQueries(2):
+            response = self.client.post('/articles/tags/bulk/', {'names': ['rust', 'python', ' go ', 'rust']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([tag['name'] for tag in response.data], ['rust', 'python', 'go'])
+        self.assertEqual(response.data[1]['id'], self.python.pk)
+        self.assertEqual(Tag.objects.count(), 3)
+
+        response = self.client.post('/articles/categories/bulk/', {'names': ['News', 'Sport']}, format='json')
+        self.assertEqual([category['name'] for category in response.data], ['News', 'Sport'])
+        self.assertEqual(Category.objects.count(), 2)
+
+    def test_bulk_lookup(self):
+        Tag.objects.create(name='django')
+        response = self.client.get('/articles/tags/bulk/', {'name': ['django', 'missing', 'python']})
+        self.assertEqual([tag['name'] for tag in response.data], ['django', 'python'])
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_bulk_validation(self):
+        self.assertEqual(self.client.post('/articles/tags/bulk/', {'names': ['x']}, format='json').status_code, 401)
+        self.client.force_authenticate(self.user)
+        for names in ([], ['x' * 51], ['ok'] * 101):
+            response = self.client.post('/articles/tags/bulk/', {'names': names}, format='json')
+            self.assertEqual(response.status_code, 400, names)
+        self.assertEqual(self.client.get('/articles/tags/bulk/').status_code, 400)
+
+    def test_new_tags_invalidate_tag_list(self):
+        self.assertEqual(len(self.client.get('/articles/tags/').data), 1)
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/articles/tags/bulk/', {'names': ['rust']}, format='json')
+        self.client.force_authenticate(None)
+        self.assertEqual(len(self.client.get('/articles/tags/').data), 2)
+
+    def test_article_tags_by_id_or_name(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/articles/articles/', {
+            'category': Category.objects.create(name='News').pk, 'tags': [self.python.pk, 'django', 'rust', 'python'],
+            'contents': [{'language': 'en', 'title': 'Hello', 'body': 'World'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        tags = dict(Tag.objects.values_list('name', 'pk'))
+        self.assertEqual(response.data['tags'], [self.python.pk, tags['django'], tags['rust']])
+        self.assertEqual(Tag.objects.get(name='django').article_count, 1)
+
+        article = response.data['id']
+        response = self.client.patch(f'/articles/articles/{article}/', {'tags': ['go']}, format='json')
+        self.assertEqual(response.data['tags'], [Tag.objects.get(name='go').pk])
+
+    def test_string_ids_stay_ids(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/articles/articles/', {
+            'tags': [str(self.python.pk), '999'], 'contents': [{'language': 'en', 'title': 'Hello', 'body': 'World'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['tags'], ['Invalid pk "999" - object does not exist.'])
+        response = self.client.post('/articles/articles/', {
+            'category': Category.objects.create(name='News').pk, 'tags': [str(self.python.pk)],
+            'contents': [{'language': 'en', 'title': 'Hello', 'body': 'World'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['tags'], [self.python.pk])
+        self.assertEqual(Tag.objects.count(), 1)
+
+    def test_names_ignore_case(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/articles/articles/', {
+            'category': Category.objects.create(name='News').pk, 'tags': ['Python', 'Rust', 'rust'],
+            'contents': [{'language': 'en', 'title': 'Hello', 'body': 'World'}],
+        }, format='json')
+        self.assertEqual(response.data['tags'], [self.python.pk, Tag.objects.get(name='Rust').pk])
+        self.assertEqual(sorted(Tag.objects.values_list('name', flat=True)), ['Rust', 'python'])
+
+        response = self.client.post('/articles/tags/bulk/', {'names': ['RUST', 'Go', 'go']}, format='json')
+        self.assertEqual([tag['name'] for tag in response.data], ['Rust', 'Go'])
+        response = self.client.get('/articles/tags/bulk/', {'name': ['PYTHON', 'GO']})
+        self.assertEqual([tag['name'] for tag in response.data], ['python', 'Go'])
+
+        response = self.client.post('/articles/tags/', {'name': 'PYTHON'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['name'], ['Tag with this name already exists.'])
+        response = self.client.patch(f'/articles/tags/{self.python.pk}/', {'name': 'Python'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_article_tag_errors(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/articles/articles/', {
+            'tags': [999, '  ', True],
+            'contents': [{'language': 'en', 'title': 'Hello', 'body': 'World'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['tags']), {1, 2})
+        response = self.client.post('/articles/articles/', {
+            'tags': [999], 'contents': [{'language': 'en', 'title': 'Hello', 'body': 'World'}],
+        }, format='json')
+        self.assertEqual(response.data['tags'], ['Invalid pk "999" - object does not exist.'])
+        self.assertFalse(Article.objects.exists())
+
+
+class ReplicaRoutingTests(ArticleAPITestCase):
+    """Uncached article reads go to a second SQLite file; everything else stays on the primary."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Registered after TestCase setup so it is neither blocked nor wrapped in the test transaction.
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.databases['replica'] = {
+            **connections.databases['default'], 'NAME': os.path.join(cls.directory.name, 'replica.sqlite3'),
+        }
+        call_command('migrate', database='replica', verbosity=0)
+        Tag.objects.using('replica').create(name='replica')
+        author = User.objects.using('replica').create(pk=500, username='replica', email='replica@example.com')
+        Article.objects.using('replica').create(pk=500, author=author)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections.databases['replica']
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='password')
+        Tag.objects.create(name='primary')
+
+    def authenticate(self):
+        # A real token, so the user lookup has to find the primary's row.
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {UserRefreshToken.for_user(self.user).access_token}')
+
+    def test_uncached_reads_use_replica(self):
+        primary = create_articles(self.user, 1, comments=0)[0]
+        self.authenticate()
+        with override_settings(DATABASE_REPLICAS=['replica']):
+            self.assertEqual([row['id'] for row in self.client.get('/articles/articles/').data['results']], [500])
+            self.assertEqual(self.client.get('/articles/articles/500/').status_code, 200)
+            self.assertEqual(self.client.get(f'/articles/articles/{primary.pk}/').status_code, 404)
+            # Not a list/retrieve queryset: stays on the primary.
+            self.assertEqual(self.client.get('/account/userinfo/').data['username'], 'author')
+
+    def test_cache_fills_read_primary(self):
+        primary = create_articles(self.user, 1, comments=0)[0]
+        with override_settings(DATABASE_REPLICAS=['replica']):
+            self.assertEqual([row['id'] for row in self.client.get('/articles/articles/').data['results']], [primary.pk])
+            self.assertEqual([tag['name'] for tag in self.client.get('/articles/tags/').data], ['primary'])
+
+    def test_writes_use_primary(self):
+        self.authenticate()
+        with override_settings(DATABASE_REPLICAS=['replica']):
+            response = self.client.post('/articles/tags/', {'name': 'new'}, format='json')
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(sorted(Tag.objects.values_list('name', flat=True)), ['new', 'primary'])
+        self.assertEqual(list(Tag.objects.using('replica').values_list('name', flat=True)), ['replica'])
+
+    def test_primary_without_replicas(self):
+        self.authenticate()
+        self.assertEqual(self.client.get('/articles/articles/').data['results'], [])
+
+    def test_search_index_follows_the_database(self):
+        content = ArticleContent(pk=999, article_id=1, language='en', title='Elsewhere', body='Body')
+        backend = get_search_backend('replica')
+        backend.index([content])
+        try:
+            for alias, expected in (('replica', [(999,)]), ('default', [])):
+                with connections[alias].cursor() as cursor:
+                    cursor.execute(f'SELECT rowid FROM {backend.table} WHERE rowid = 999')
+                    self.assertEqual(cursor.fetchall(), expected)
+        finally:
+            backend.remove([999])
+
+    def test_sqlite_pragmas(self):
+        with connections['replica'].cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA journal_mode').fetchone(), ('wal',))
+            self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone(), (1,))
+
+
+class ArticleSnapshotTests(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='password')
+        self.tag = Tag.objects.create(name='python')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article = Article.objects.create(author=self.user)
+            self.article.tags.add(self.tag)
+            for language in ('fr', 'en'):
+                ArticleContent.objects.create(article=self.article, language=language, title=f'Title {language}', body='Body é')
+            Comment.objects.create(article=self.article, user=self.user, content='First')
+        self.url = f'/articles/articles/{self.article.pk}/'
+
+    def get_both(self, *args, **kwargs):
+        with override_settings(ARTICLE_SNAPSHOTS=False):
+            get_cache().clear()
+            expected = self.client.get(self.url, *args, **kwargs)
+        get_cache().clear()
+        # ETag/Last-Modified lookup, snapshot
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, *args, **kwargs)
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        self.assertEqual(response.content, expected.content)
+        return response.json()
+
+    def test_served_byte_for_byte(self):
+        self.assertEqual([content['language'] for content in self.get_both()['contents']], ['fr', 'en'])
+        self.assertEqual([content['language'] for content in self.get_both({'lang': 'en'})['contents']], ['en'])
+        self.assertEqual([content['language'] for content in self.get_both(HTTP_ACCEPT_LANGUAGE='fr')['contents']], ['fr'])
+        # No Arabic translation: the oldest one, as with_related(languages=...) would pick.
+        ArticleContent.objects.filter(article=self.article, language='en').update(language='es')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.save()
+        self.assertEqual([content['language'] for content in self.get_both({'lang': 'ar'})['contents']], ['fr'])
+
+    def test_refreshed_when_the_article_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(article=self.article, user=self.user, content='Second')
+            self.article.tags.add(Tag.objects.create(name='django'))
+            ArticleContent.objects.get(article=self.article, language='fr').delete()
+        data = self.get_both()
+        self.assertEqual(len(data['comments']), 2)
+        self.assertEqual(data['comments_count'], 2)
+        self.assertEqual(len(data['tags']), 2)
+        self.assertEqual(sorted(ArticleSnapshot.objects.values_list('language', flat=True)), ['all', 'en'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+        self.assertEqual(len(self.get_both()['tags']), 1)
+        self.article.delete()
+        self.assertFalse(ArticleSnapshot.objects.exists())
+
+    def test_late_refresh_does_not_overwrite_newer(self):
+        # A refresh reads the article, then stalls while two writes are refreshed and committed.
+        loaded = Article.objects.with_related(comments_limit=settings.ARTICLE_INLINE_COMMENTS).get(pk=self.article.pk)
+        stale = render_snapshots(loaded, timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            ArticleContent.objects.filter(article=self.article, language='en').update(title='Retitled')
+            ArticleContent.objects.get(article=self.article, language='fr').delete()
+        store(stale, [self.article.pk])
+        self.assertEqual(sorted(ArticleSnapshot.objects.values_list('language', flat=True)), ['all', 'en'])
+        self.assertEqual([content['title'] for content in self.get_both()['contents']], ['Retitled'])
+
+    def test_only_anonymous_json_reads(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(self.url).data['id'], self.article.pk)
+        self.client.force_authenticate(None)
+        response = self.client.get(self.url, HTTP_ACCEPT='application/json; indent=2')
+        self.assertEqual(response.data['id'], self.article.pk)
+        self.assertIn(b'\n  ', response.content)
+
+    def test_rebuild_command(self):
+        create_articles(self.user, 3, languages=('en',))
+        ArticleSnapshot.objects.filter(article=self.article).update(body=b'stale')
+        out = StringIO()
+        call_command('rebuild_snapshots', workers=1, batch_size=2, stdout=out)
+        self.assertIn('Rendered 9 snapshot(s) of 4 article(s)', out.getvalue())
+        self.assertEqual(ArticleSnapshot.objects.count(), 9)
+        self.assertEqual(self.get_both()['id'], self.article.pk)
+
+
+class ORJSONRendererTests(ArticleAPITestCase):
+    def test_same_bytes_as_stdlib_renderer(self):
+        data = {
+            'text': 'Ünïcödé   line   "quoted" </script>', 'lazy': gettext_lazy('Not found.'),
+            'decimal': Decimal('1.50'), 'numbers': [0, -1, 2 ** 40, 1.5, True, None], 'nested': {'empty': [], 'tuple': (1, 2)},
+            'rows': TagSerializer([Tag(pk=1, name='python')], many=True).data,
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+        indented = 'application/json; indent=2'
+        self.assertEqual(ORJSONRenderer().render(data, indented), JSONRenderer().render(data, indented))
+        self.assertEqual(ORJSONRenderer().render({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+
+    def test_native_datetimes_and_uuids(self):
+        value = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        uuid = UUID('12345678-1234-5678-1234-567812345678')
+        self.assertEqual(
+            ORJSONRenderer().render({'at': value, 'id': uuid}),
+            b'{"at":"2024-05-01T12:30:15.123456Z","id":"12345678-1234-5678-1234-567812345678"}',
+        )
+
+    def test_parser(self):
+        self.assertEqual(ORJSONParser().parse(BytesIO('{"name": "é", "n": [1]}'.encode())), {'name': 'é', 'n': [1]})
+        with self.assertRaisesMessage(ParseError, 'JSON parse error'):
+            ORJSONParser().parse(BytesIO(b'{"name": NaN}'))
+        user = User.objects.create_user(username='author', email='author@example.com', password='password')
+        self.client.force_authenticate(user)
+        response = self.client.post('/articles/tags/', b'{"name": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.data['detail'])
+
+
+
+class CompressionMiddlewareTests(ArticleAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', email='writer@example.com', password='secret-pass')
+        create_articles(cls.user, 10, comments=0)
+
+    def test_gzip_above_threshold(self):
+        plain = self.client.get('/articles/articles/')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get('/articles/articles/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        revalidated = self.client.get('/articles/articles/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    @override_settings(API_COMPRESSION_MIN_SIZE=10 ** 6)
+    def test_small_responses_are_left_alone(self):
+        response = self.client.get('/articles/articles/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotIn('Accept-Encoding', response.get('Vary', ''))
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_brotli_preferred_when_accepted(self):
+        plain = self.client.get('/articles/articles/')
+        response = self.client.get('/articles/articles/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+        response = self.client.get('/articles/articles/', HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_compressed_body_is_memoized_by_etag(self):
+        first = self.client.get('/articles/articles/', HTTP_ACCEPT_ENCODING='gzip')
+        plain = self.client.get('/articles/articles/')
+        key = compressed_cache_key('/articles/articles/', plain['ETag'], len(plain.content), 'gzip')
+        self.assertEqual(get_cache().get(key), first.content)
+        # gzip output is salted per call, so equal bytes mean it was not recompressed.
+        self.assertEqual(self.client.get('/articles/articles/', HTTP_ACCEPT_ENCODING='gzip').content, first.content)
+
+    @override_settings(API_COMPRESSION_MIN_SIZE=1)
+    def test_unsafe_methods_and_non_json_are_not_compressed(self):
+        response = self.client.post('/account/login/', {'email': 'writer@example.com', 'password': 'secret-pass'}, format='json', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(choose_encoding('identity'), None)
+        self.assertEqual(choose_encoding('*'), 'br' if brotli else 'gzip')
+        self.assertFalse(is_json('text/html; charset=utf-8'))
+        self.assertTrue(is_json('application/problem+json'))
+
+
+class CommentBatchTests(ArticleAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', email='writer@example.com', password='secret-pass')
+        cls.other = User.objects.create_user(username='other', email='other@example.com', password='secret-pass')
+        cls.first, cls.second = create_articles(cls.user, 2, comments=0)
+
+    def post_batch(self, comments, user=None):
+        self.client.force_authenticate(user or self.user)
+        return self.client.post('/articles/comments/batch/', {'comments': comments}, format='json')
+
+    def test_batch_insert(self):
+        comments = [{'article': self.first.pk, 'content': f'Comment {i}'} for i in range(5)]
+        comments.append({'article': self.second.pk, 'content': 'Elsewhere'})
+        # in_bulk, savepoint, INSERT, comment counters, updated_at, release
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, self.assertNumQueries(6):
+            response = self.post_batch(comments)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([comment['content'] for comment in response.data], [comment['content'] for comment in comments])
+        self.assertTrue(all(comment['id'] for comment in response.data))
+        self.assertTrue(callbacks)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.comment_count, 5)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(f'/articles/articles/{self.second.pk}/').json()['comments_count'], 1)
+
+    @override_settings(COMMENT_RATE_LIMIT=None)
+    def test_batch_is_all_or_nothing(self):
+        response = self.post_batch([{'article': self.first.pk, 'content': 'Fine'}, {'article': 999, 'content': 'Lost'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['comments'], [{}, {'article': ['Invalid pk "999" - object does not exist.']}])
+        for comments in ([], [{'article': self.first.pk, 'content': 'x'}] * 101, [{'article': self.first.pk}]):
+            self.assertEqual(self.post_batch(comments).status_code, 400)
+        self.assertFalse(Comment.objects.exists())
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post('/articles/comments/batch/', {'comments': []}, format='json').status_code, 401)
+
+    def test_single_comment_with_unknown_article(self):
+        self.client.force_authenticate(self.user)
+        for url in ('/articles/comments/', '/articles/comment-manager/'):
+            for article in (999, 'abc', None):
+                data = {'content': 'Hello'} if article is None else {'article': article, 'content': 'Hello'}
+                response = self.client.post(url, data, format='json')
+                self.assertEqual(response.status_code, 400, (url, article))
+                self.assertIn('article', response.data)
+
+    @override_settings(COMMENT_RATE_LIMIT='3/min')
+    def test_rate_limit_counts_every_comment(self):
+        self.client.force_authenticate(self.user)
+        for _ in range(2):
+            self.assertEqual(self.client.post('/articles/comments/', {'article': self.first.pk, 'content': 'Hi'}, format='json').status_code, 201)
+        self.assertEqual(self.post_batch([{'article': self.first.pk, 'content': 'Hi'}] * 2).status_code, 429)
+        self.assertEqual(self.post_batch([{'article': self.first.pk, 'content': 'Hi'}]).status_code, 201)
+        response = self.client.post('/articles/comment-manager/', {'article': self.first.pk, 'content': 'Hi'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Comment.objects.count(), 3)
+        # Per user, and reads are never throttled.
+        self.assertEqual(self.post_batch([{'article': self.first.pk, 'content': 'Hi'}], user=self.other).status_code, 201)
+        self.assertEqual(self.client.get('/articles/comments/').status_code, 200)
+
+    @override_settings(COMMENT_RATE_LIMIT='3/min')
+    def test_rejected_requests_leave_the_quota_unchanged(self):
+        for _ in range(3):
+            self.assertEqual(self.post_batch([{'article': 999, 'content': 'Hi'}] * 3).status_code, 400)
+            self.assertEqual(self.post_batch([{'article': self.first.pk}] * 2).status_code, 400)
+            self.assertEqual(self.client.post('/articles/comments/', {'article': 999, 'content': 'Hi'}, format='json').status_code, 400)
+        self.assertEqual(self.post_batch([{'article': self.first.pk, 'content': 'Hi'}] * 3).status_code, 201)
+        self.assertEqual(self.post_batch([{'article': self.first.pk, 'content': 'Hi'}]).status_code, 429)
+
+    @override_settings(COMMENT_RATE_LIMIT='3/min')
+    def test_batch_larger_than_the_limit_is_a_bad_request(self):
+        response = self.post_batch([{'article': self.first.pk, 'content': 'Hi'}] * 4)
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('Retry-After', response)
+        self.assertIn('3/min', str(response.data['comments']))
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(self.post_batch([{'article': self.first.pk, 'content': 'Hi'}] * 3).status_code, 201)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('30/min'), (30, 60))
+        self.assertEqual(parse_rate(' 5/hour '), (5, 3600))
+        for rate in (None, '', ' ', 'none', 'None', 'NONE'):
+            self.assertEqual(parse_rate(rate), (None, None), rate)
+        for rate in ('lots', '30', '30/week', 'x/min', '0/min', '-1/s'):
+            with self.assertRaises(ValueError, msg=rate):
+                parse_rate(rate)
+        with override_settings(COMMENT_RATE_LIMIT='30/fortnight'), self.assertRaises(ImproperlyConfigured):
+            apps.get_app_config('article').ready()
+
+    @override_settings(COMMENT_RATE_LIMIT='10/min')
+    def test_sliding_window_weighs_the_previous_window(self):
+        request, view = SimpleNamespace(user=self.user), SimpleNamespace()
+        throttle = CommentRateThrottle()
+        start = 600 * 60
+        throttle.timer = lambda: start + 50
+        for _ in range(10):
+            self.assertTrue(throttle.allow_request(request, view))
+        self.assertFalse(throttle.allow_request(request, view))
+        # A quarter into the next window, 75% of the previous 10 still count.
+        throttle.timer = lambda: start + 75
+        self.assertTrue(all(throttle.allow_request(request, view) for _ in range(2)))
+        self.assertFalse(throttle.allow_request(request, view))
+        self.assertAlmostEqual(throttle.wait(), 0.5 * 60 / 10)
+        # Halfway: 5 + 2 in flight, room for 3 more.
+        throttle.timer = lambda: start + 90
+        self.assertTrue(all(throttle.allow_request(request, view) for _ in range(3)))
+        self.assertFalse(throttle.allow_request(request, view))
@@ -0,0 +1,93 @@
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from .cache import get_cache
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Values (after lowercasing) that turn a limit off, so it can be disabled from the environment.
+DISABLED = ('', 'none')
+
+
+def parse_rate(rate):
+    """
+    ``'30/min'`` -> ``(30, 60)``; None, ``''`` or ``'none'`` disable the
+    limit and give ``(None, None)``. Anything else raises ValueError.
+    """
+    if rate is None or rate.strip().lower() in DISABLED:
+        return None, None
+    count, _, period = rate.partition('/')
+    try:
+        count, period = int(count), PERIODS[period.strip()[:1]]
+    except (KeyError, ValueError):
+        raise ValueError(f'invalid rate {rate!r}, expected "<count>/<s|min|hour|day>" or "none"')
+    if count < 1:
+        raise ValueError(f'invalid rate {rate!r}, the count must be positive')
+    return count, period
+
+
+class CommentRateThrottle(BaseThrottle):
+    """
+    Per-user limit of ``COMMENT_RATE_LIMIT`` comments, as a sliding-window
+    counter in the API cache: one integer per user and fixed window, with
+    the previous window's count weighted by how much of it still overlaps
+    the sliding one. A batch costs one unit per comment (the view's
+    ``get_throttle_cost``). Counters are bumped with atomic ``incr`` and
+    rolled back when over the limit, so no database write is involved and
+    concurrent requests cannot both take the last slot.
+    """
+    timer = time.time
+    # The counter and units an allowed request took, for refund().
+    key = None
+
+    def get_cache_key(self, request, window):
+        return f'throttle:comments:{request.user.pk}:{window}'
+
+    def allow_request(self, request, view):
+        limit, period = parse_rate(settings.COMMENT_RATE_LIMIT)
+        if limit is None or not request.user.is_authenticated:
+            return True
+        cost = view.get_throttle_cost(request) if hasattr(view, 'get_throttle_cost') else 1
+        if cost > limit:
+            # Could never be let through; CommentBatchSerializer rejects it with a 400 that says why.
+            return True
+
+        window, elapsed = divmod(self.timer(), period)
+        self.period, self.elapsed = period, elapsed
+        cache = get_cache()
+        key = self.get_cache_key(request, int(window))
+        # Two periods: the window is read again as "previous" during the next one.
+        cache.add(key, 0, timeout=2 * period)
+        try:
+            current = cache.incr(key, cost)
+        except ValueError:
+            # Evicted between add() and incr().
+            cache.set(key, cost, timeout=2 * period)
+            current = cost
+        self.previous = cache.get(self.get_cache_key(request, int(window) - 1), 0)
+        self.weight = 1 - elapsed / period
+        self.excess = self.previous * self.weight + current - limit
+        if self.excess <= 0:
+            self.key, self.cost = key, cost
+            return True
+        cache.decr(key, cost)
+        return False
+
+    def refund(self):
+        """Give back the units taken by allow_request(), for a request that posted nothing."""
+        if self.key is None:
+            return
+        try:
+            get_cache().decr(self.key, self.cost)
+        except ValueError:
+            # Evicted: there is nothing left to give back.
+            pass
+        self.key = None
+
+    def wait(self):
+        remaining = self.period - self.elapsed
+        if self.previous:
+            # The previous window's share shrinks linearly until it is gone.
+            return min(self.excess * self.period / self.previous, remaining)
+        return remaining
@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     CategoryViewSet,
     TagViewSet,
     ArticleViewSet,
     ArticleContentViewSet,
     CommentViewSet,
+    ArticleCommentViewSet,
     ArticleManagerViewSet,
     CommentManagerViewSet
 )
@@ -19,6 +21,13 @@ router.register(r'comments', CommentViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/categories/', async_views.category_list, name='async-category-list'),
+    path('async/categories/<int:pk>/', async_views.category_detail, name='async-category-detail'),
+    path('async/tags/', async_views.tag_list, name='async-tag-list'),
+    path('async/tags/<int:pk>/', async_views.tag_detail, name='async-tag-detail'),
+    path('async/articles/', async_views.article_list, name='async-article-list'),
+    path('async/articles/<int:pk>/', async_views.article_detail, name='async-article-detail'),
+    path('articles/<int:article_pk>/comments/', ArticleCommentViewSet.as_view({'get': 'list'}), name='article-comments'),
     path('article-manager/', ArticleManagerViewSet.as_view({
         'get': 'retrieve',
         'post': 'create',
@@ -26,6 +35,12 @@ urlpatterns = [
         'patch': 'update',
         'delete': 'destroy'
     })),
+    path('article-manager/<int:pk>/', ArticleManagerViewSet.as_view({
+        'get': 'retrieve',
+        'put': 'update',
+        'patch': 'update',
+        'delete': 'destroy'
+    })),
     path('comment-manager/', CommentManagerViewSet.as_view({
         'get': 'retrieve',
         'post': 'create',
@@ -33,4 +48,10 @@ urlpatterns = [
         'patch': 'update',
         'delete': 'destroy'
     })),
+    path('comment-manager/<int:pk>/', CommentManagerViewSet.as_view({
+        'get': 'retrieve',
+        'put': 'update',
+        'patch': 'update',
+        'delete': 'destroy'
+    })),
 ]
\ No newline at end of file
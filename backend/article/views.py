@@ -1,55 +1,250 @@
 from rest_framework import viewsets, permissions, filters, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from django_filters.rest_framework import DjangoFilterBackend
+from backend.routers import ReplicaReadMixin
 from .models import Category, Tag, Article, ArticleContent, Comment
-from .serializers import CategorySerializer, TagSerializer, ArticleSerializer, ArticleContentSerializer, CommentSerializer
-from .filters import ArticleFilter
+from .serializers import BulkNameSerializer, CommentBatchSerializer, CategorySerializer, TagSerializer, ArticleSerializer, ArticleListSerializer, ArticleContentSerializer, CommentSerializer
+from .filters import ArticleFilter, FullTextSearchFilter
+from .pagination import KeysetPagination
+from .cache import CachedResponseMixin, ConditionalResponseMixin, invalidate
+from .bulk import create_comments, export_articles, import_articles
+from .languages import get_language_chain
+from .snapshots import SnapshotResponseMixin
+from .throttles import CommentRateThrottle
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class BulkNameMixin:
+    """
+    ``bulk/`` for name-keyed models: GET ``?name=a&name=b`` returns the
+    existing rows, POST ``{"names": [...]}`` returns every row, creating the
+    missing ones. Either way it is one round trip and a fixed number of
+    queries, in the order the names were given.
+    """
+    def get_bulk_names(self, data):
+        serializer = BulkNameSerializer(data=data, model=self.queryset.model)
+        serializer.is_valid(raise_exception=True)
+        # Names match ignoring case, so "Rust" and "rust" are one entry.
+        names = {}
+        for name in serializer.validated_data['names']:
+            names.setdefault(name.lower(), name)
+        return list(names.values())
+
+    def lookup_names(self, request):
+        names = self.get_bulk_names({'names': request.query_params.getlist('name')})
+        rows = {row.name.lower(): row for row in self.get_queryset().matching(names)}
+        return Response(self.get_serializer([rows[name.lower()] for name in names if name.lower() in rows], many=True).data)
+
+    @action(detail=False, methods=['get', 'post'], url_path='bulk')
+    def bulk(self, request):
+        if request.method == 'GET':
+            return self.cached(request, self.lookup_names)
+        names = self.get_bulk_names(request.data)
+        rows = self.get_queryset().resolve(names)
+        # bulk_create sends no post_save, so invalidate as the receivers would.
+        invalidate(*self.get_cache_scopes())
+        return Response(self.get_serializer([rows[name] for name in names], many=True).data)
+
+class CategoryViewSet(BulkNameMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    stateless_auth = True
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['name', 'article_count']
+
+    def get_cache_scopes(self):
+        return ['categories']
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(BulkNameMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    stateless_auth = True
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['name', 'article_count']
 
-class ArticleViewSet(viewsets.ModelViewSet):
+    def get_cache_scopes(self):
+        return ['tags']
+
+class ArticleViewSet(ReplicaReadMixin, ConditionalResponseMixin, SnapshotResponseMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    stateless_auth = True
     filterset_class = ArticleFilter
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['contents__title', 'contents__body']
     ordering_fields = ['created_at', 'updated_at']
+    ordering = ['-created_at']
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        languages = get_language_chain(self.request)
+        if self.action == 'list':
+            queryset = Article.objects.for_list(languages=languages or [settings.ARTICLE_DEFAULT_LANGUAGE])
+        else:
+            queryset = Article.objects.with_related(comments_limit=settings.ARTICLE_INLINE_COMMENTS, languages=languages)
+        return self.route_read(queryset)
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ArticleListSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['languages'] = get_language_chain(self.request) or [settings.ARTICLE_DEFAULT_LANGUAGE]
+        return context
+
+    def get_language_key(self, request):
+        return ','.join(get_language_chain(request) or ['all'])
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        patch_vary_headers(response, ['Accept-Language'])
+        return response
+
+    def should_cache(self, request):
+        return not request.user.is_authenticated
+
+    def get_cache_scopes(self):
+        if self.action == 'list':
+            return ['articles']
+        return ['article-details', f"article:{self.kwargs[self.lookup_field]}"]
+
+    def get_validators(self, request):
+        if self.action == 'list':
+            stats = self.filter_queryset(Article.objects.all()).order_by().aggregate(
+                last_modified=Max('updated_at'), count=Count('id'),
+            )
+            return f"{stats['count']}:{stats['last_modified']}", stats['last_modified']
+        try:
+            updated_at = Article.objects.filter(pk=self.kwargs[self.lookup_field]).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            updated_at = None
+        if updated_at is None:
+            return None, None
+        return f"{self.kwargs[self.lookup_field]}:{updated_at}", updated_at
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[permissions.IsAdminUser])
+    def bulk_import(self, request):
+        """Create articles from an NDJSON body (one ArticleSerializer-shaped object per line)."""
+        if request.stream is None:
+            return Response({"detail": "Request body is empty."}, status=status.HTTP_400_BAD_REQUEST)
+        result = import_articles(iter(request.stream.readline, b''), author=request.user)
+        return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'], url_path='export', permission_classes=[permissions.IsAdminUser])
+    def bulk_export(self, request):
+        response = StreamingHttpResponse(export_articles(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="articles.ndjson"'
+        return response
+
 class ArticleContentViewSet(viewsets.ModelViewSet):
     queryset = ArticleContent.objects.all()
     serializer_class = ArticleContentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    stateless_auth = True
+    ordering = ['id']
+    pagination_class = KeysetPagination
+
+class ArticleCommentViewSet(viewsets.GenericViewSet):
+    """The full comment thread of one article, served in keyset pages."""
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    stateless_auth = True
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['created_at']
+    ordering = ['-created_at']
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return Comment.objects.filter(article_id=self.kwargs['article_pk']).select_related('user').only(
+            'id', 'article_id', 'content', 'created_at', 'user__id', 'user__email',
+        )
+
+    def list(self, request, article_pk=None):
+        if not Article.objects.filter(pk=article_pk).exists():
+            raise NotFound("Article not found.")
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
+def get_comment_article(article_id):
+    """The article a new comment goes to; a 400 rather than a 500 for a bad id."""
+    try:
+        return Article.objects.only('id').get(pk=article_id)
+    except (Article.DoesNotExist, TypeError, ValueError):
+        raise ValidationError({'article': [f'Invalid pk "{article_id}" - object does not exist.']})
+
+class CommentThrottleMixin:
+    """
+    Apply ``CommentRateThrottle`` to the actions that post comments. The
+    throttle runs before the body is validated, so a request rejected with a
+    4xx (nothing posted) gets its units back.
+    """
+    throttled_actions = ('create',)
+    comment_throttles = ()
+
+    def get_throttles(self):
+        if self.action in self.throttled_actions:
+            self.comment_throttles = [CommentRateThrottle()]
+            return self.comment_throttles
+        return super().get_throttles()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if 400 <= response.status_code < 500:
+            for throttle in self.comment_throttles:
+                throttle.refund()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+class CommentViewSet(CommentThrottleMixin, viewsets.ModelViewSet):
+    queryset = Comment.objects.select_related('user').only(
+        'id', 'article_id', 'content', 'created_at', 'user__id', 'user__email',
+    )
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    stateless_auth = True
+    ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    throttled_actions = ('create', 'batch')
 
     def perform_create(self, serializer):
-        article_id = self.request.data.get('article')
-        article = Article.objects.get(pk=article_id)
+        article = get_comment_article(self.request.data.get('article'))
         serializer.save(user=self.request.user, article=article)
 
+    def get_throttle_cost(self, request):
+        if self.action == 'batch':
+            comments = request.data.get('comments') if isinstance(request.data, dict) else None
+            return max(len(comments), 1) if isinstance(comments, list) else 1
+        return 1
+
+    @action(detail=False, methods=['post'], url_path='batch', permission_classes=[permissions.IsAuthenticated])
+    def batch(self, request):
+        """Post up to 100 comments, to any articles, in one request; all or nothing."""
+        serializer = CommentBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        comments = create_comments(request.user, serializer.validated_data['comments'])
+        return Response(CommentSerializer(comments, many=True).data, status=status.HTTP_201_CREATED)
+
 # Custom ViewSets for more granular control
 class ArticleManagerViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def retrieve(self, request, pk=None):
         try:
-            article = Article.objects.get(pk=pk)
+            article = Article.objects.with_related(
+                comments_limit=settings.ARTICLE_INLINE_COMMENTS, languages=get_language_chain(request),
+            ).get(pk=pk)
             serializer = ArticleSerializer(article)
             return Response(serializer.data)
         except Article.DoesNotExist:
@@ -82,7 +277,7 @@ class ArticleManagerViewSet(viewsets.ViewSet):
             raise NotFound("Article not found.")
 
 
-class CommentManagerViewSet(viewsets.ViewSet):
+class CommentManagerViewSet(CommentThrottleMixin, viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def retrieve(self, request, pk=None):
@@ -96,8 +291,7 @@ class CommentManagerViewSet(viewsets.ViewSet):
     def create(self, request):
         serializer = CommentSerializer(data=request.data)
         if serializer.is_valid():
-            article_id = request.data.get('article')
-            article = Article.objects.get(pk=article_id)
+            article = get_comment_article(request.data.get('article'))
             serializer.save(user=request.user, article=article)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,170 @@
+import bisect
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('backend.requests')
+
+# Upper bounds, in milliseconds, of the latency histogram buckets.
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class QueryRecorder:
+    """``execute_wrapper`` hook that times every query and counts identical SQL templates."""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        """SQL run ``threshold`` or more times with different parameters: usually an N+1 loop."""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+class ViewStats:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.db_duration = 0.0
+        self.queries = 0
+        self.duplicate_requests = 0
+
+    def add(self, duration_ms, db_ms, queries, has_duplicates):
+        self.buckets[bisect.bisect_left(BUCKETS, duration_ms)] += 1
+        self.count += 1
+        self.duration += duration_ms
+        self.db_duration += db_ms
+        self.queries += queries
+        self.duplicate_requests += has_duplicates
+
+    def as_dict(self):
+        return {
+            'requests': self.count,
+            'mean_ms': self.duration / self.count,
+            'mean_db_ms': self.db_duration / self.count,
+            'mean_queries': self.queries / self.count,
+            'n_plus_one_requests': self.duplicate_requests,
+            'histogram_ms': {
+                **{f'le_{bound}': count for bound, count in zip(BUCKETS, self.buckets)},
+                'inf': self.buckets[-1],
+            },
+        }
+
+
+class MetricsRegistry:
+    """Per-process histograms of the sampled requests, keyed by view."""
+    def __init__(self):
+        self.views = {}
+        self.lock = threading.Lock()
+
+    def add(self, view, *args):
+        with self.lock:
+            self.views.setdefault(view, ViewStats()).add(*args)
+
+    def snapshot(self):
+        with self.lock:
+            return {view: stats.as_dict() for view, stats in sorted(self.views.items())}
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+registry = MetricsRegistry()
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route
+
+
+class RequestMetricsMiddleware:
+    """
+    Count queries and database time for a sample of requests
+    (``REQUEST_METRICS_SAMPLE_RATE``, 0 to 1). Sampled responses get a
+    ``Server-Timing`` header and one JSON log line on the
+    ``backend.requests`` logger, at WARNING when the same SQL ran at least
+    ``REQUEST_METRICS_DUPLICATE_THRESHOLD`` times. Unsampled requests cost a
+    single ``random()`` call. Works in both sync and async stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.REQUEST_METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+        recorder, started = QueryRecorder(), time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        return self.report(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.REQUEST_METRICS_SAMPLE_RATE:
+            return await self.get_response(request)
+        recorder, started = QueryRecorder(), time.perf_counter()
+        # Connections are per thread, and the ORM (async views' included)
+        # queries from the thread-sensitive sync_to_async thread, so the
+        # wrapper goes on that thread's connections rather than this one's.
+        stack = await sync_to_async(self.recording, thread_sensitive=True)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close, thread_sensitive=True)()
+        return self.report(request, response, recorder, started)
+
+    def recording(self, recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def report(self, request, response, recorder, started):
+        duration_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.duration * 1000
+        duplicates = recorder.duplicates(settings.REQUEST_METRICS_DUPLICATE_THRESHOLD)
+        view = get_view_name(request)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries"',
+            f'app;dur={duration_ms - db_ms:.1f}',
+            f'total;dur={duration_ms:.1f}',
+        ])
+        registry.add(view, duration_ms, db_ms, recorder.count, bool(duplicates))
+        logger.log(logging.WARNING if duplicates else logging.INFO, json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'db_ms': round(db_ms, 2),
+            'queries': recorder.count,
+            'duplicates': [{'sql': sql, 'count': count} for sql, count in duplicates],
+        }))
+        return response
@@ -0,0 +1,158 @@
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from article.cache import get_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    ``WhiteNoiseMiddleware`` that also runs natively under ASGI. WhiteNoise
+    itself is sync-only, which would push every request, API calls included,
+    through a thread; here only static file hits leave the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+def is_json(content_type):
+    media_type = content_type.split(';')[0].strip().lower()
+    return media_type == 'application/json' or media_type.endswith('+json')
+
+
+def parse_accept_encoding(header):
+    """``{coding: q}`` for an ``Accept-Encoding`` header."""
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            codings[coding.lower()] = quality
+    return codings
+
+
+def choose_encoding(header):
+    """Brotli when both sides support it, else gzip, else None."""
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get('*', 0)
+    if brotli is not None and codings.get('br', wildcard) > 0:
+        return 'br'
+    if codings.get('gzip', wildcard) > 0:
+        return 'gzip'
+    return None
+
+
+def compressed_cache_key(path, etag, length, encoding):
+    return 'api-compressed:' + hashlib.md5(f'{path}|{etag}|{length}|{encoding}'.encode('utf-8')).hexdigest()
+
+
+class CompressionMiddleware:
+    """
+    Gzip or brotli the JSON bodies of GET/HEAD responses of at least
+    ``API_COMPRESSION_MIN_SIZE`` bytes. Other methods are left alone so
+    responses carrying credentials (logins, token refreshes) are never
+    compressed next to attacker-controlled input (BREACH).
+
+    A response with an ETag is the same bytes for everyone who gets that
+    ETag, so its compressed body is kept in the API cache under the path,
+    ETag and encoding; repeat hits on a page skip recompression. The ETag
+    becomes weak, as with Django's ``GZipMiddleware``, since the bytes on
+    the wire now depend on ``Accept-Encoding``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def should_compress(self, request, response):
+        return (
+            request.method in ('GET', 'HEAD')
+            and response.status_code == 200
+            and not response.streaming
+            and not response.has_header('Content-Encoding')
+            and is_json(response.get('Content-Type', ''))
+            and len(response.content) >= settings.API_COMPRESSION_MIN_SIZE
+        )
+
+    def compress(self, body, encoding):
+        if encoding == 'br':
+            return brotli.compress(body, mode=brotli.MODE_TEXT, quality=settings.API_BROTLI_QUALITY)
+        # Random bytes in the gzip header are Django's own BREACH mitigation.
+        return compress_string(body, max_random_bytes=100)
+
+    def get_compressed(self, request, response, encoding):
+        etag = response.get('ETag')
+        if etag is None:
+            return self.compress(response.content, encoding)
+        cache = get_cache()
+        key = compressed_cache_key(request.path, etag, len(response.content), encoding)
+        body = cache.get(key)
+        if body is None:
+            body = self.compress(response.content, encoding)
+            cache.set(key, body, settings.API_COMPRESSION_CACHE_TIMEOUT)
+        return body
+
+    def process_response(self, request, response):
+        if not self.should_compress(request, response):
+            return response
+        patch_vary_headers(response, ['Accept-Encoding'])
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        body = self.get_compressed(request, response, encoding)
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
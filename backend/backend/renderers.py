@@ -0,0 +1,59 @@
+"""
+orjson-backed drop-ins for DRF's ``JSONRenderer`` and ``JSONParser``.
+
+orjson is optional: without it, and for anything it cannot reproduce
+(``indent=`` media type parameters, non-default ``UNICODE_JSON`` /
+``COMPACT_JSON`` / ``STRICT_JSON``, non-UTF-8 request bodies, values it
+refuses such as integers wider than 64 bits), both classes defer to the
+stdlib implementations they extend. Output is otherwise the same bytes
+DRF produces, except that raw ``datetime`` values (not ones already
+formatted by a serializer field) keep their microseconds.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+UTF8 = ('utf-8', 'utf8')
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Serializes natively what orjson understands (including datetimes and
+    UUIDs) and hands the rest (lazy strings, Decimals, querysets) to DRF's
+    encoder.
+    """
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder.default, option=orjson.OPT_UTC_Z)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same JavaScript-safe escaping as JSONRenderer.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower() not in UTF8:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,57 @@
+"""
+Primary/replica routing.
+
+Writes, migrations and ordinary reads go to ``default``. Views opt in to
+``DATABASE_REPLICAS`` with ``ReplicaReadMixin``, which moves only the main
+queryset of a safe ``list``/``retrieve`` (and what it prefetches) to one
+replica. Authentication, permission checks, cache bookkeeping and every
+read a write path makes stay on the primary and never see replication lag.
+"""
+import random
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+
+class ReplicaRouter:
+    def db_for_write(self, model, **hints):
+        # Including rows that were read from a replica.
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    """
+    Serve the querysets of safe ``list``/``retrieve`` requests from a read
+    replica, picked once per request. Responses that ``CachedResponseMixin``
+    is about to store (``filling_cache``) are read from the primary instead,
+    so a lagging replica can never refill a scope that was just bumped.
+    Views that override ``get_queryset`` pass their result through
+    ``route_read``.
+    """
+    read_actions = ('list', 'retrieve')
+
+    def get_read_alias(self):
+        if (
+            not settings.DATABASE_REPLICAS
+            or self.request.method not in SAFE_METHODS
+            or self.action not in self.read_actions
+            or getattr(self, 'filling_cache', False)
+        ):
+            return None
+        if not hasattr(self, '_read_alias'):
+            self._read_alias = random.choice(settings.DATABASE_REPLICAS)
+        return self._read_alias
+
+    def route_read(self, queryset):
+        alias = self.get_read_alias()
+        return queryset if alias is None else queryset.using(alias)
+
+    def get_queryset(self):
+        return self.route_read(super().get_queryset())
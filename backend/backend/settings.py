@@ -44,12 +44,16 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'corsheaders',
+    'rest_framework',
+    'rest_framework_simplejwt.token_blacklist',
     'account',
     'article',
     'django_filters',
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.RequestMetricsMiddleware',
+    'backend.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,9 +63,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'backend.middleware.AsyncWhiteNoiseMiddleware',
 
 ]
+# Share of requests whose queries and timings are recorded (see backend.metrics).
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv('REQUEST_METRICS_SAMPLE_RATE', '1' if DEBUG else '0'))
+# Identical SQL run this many times in one request is logged as a likely N+1.
+REQUEST_METRICS_DUPLICATE_THRESHOLD = 5
+
 CSRF_TRUSTED_ORIGINS = ['http://localhost:8000', 'http://127.0.0.1:8000']
 
 CORS_ALLOW_ALL_ORIGINS = True 
@@ -74,12 +83,17 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'account.authentication.ClaimsJWTAuthentication',
     ],
-     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',  # For the browsable API
+    # orjson when installed (see backend.renderers); the browsable API only while debugging.
+    'DEFAULT_RENDERER_CLASSES': ['backend.renderers.ORJSONRenderer'] + (
+        ['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []
     ),
+    'DEFAULT_PARSER_CLASSES': [
+        'backend.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
         'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
 
 }
@@ -106,13 +120,63 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DATABASE_ENGINE is "sqlite" (default, single node) or "postgresql".
+# DATABASE_REPLICAS lists read replicas, comma separated: hosts for
+# PostgreSQL, file paths for SQLite. Article list and detail reads that are
+# not going into the response cache are served from them (see backend.routers).
+
+DATABASE_ENGINE = os.getenv('DATABASE_ENGINE', 'sqlite')
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DATABASE_NAME'),
+            'USER': os.getenv('DATABASE_USER'),
+            'PASSWORD': os.getenv('DATABASE_PASSWORD'),
+            'HOST': os.getenv('DATABASE_HOST', 'localhost'),
+            'PORT': os.getenv('DATABASE_PORT', '5432'),
+            # Persistent connections, checked before reuse: each worker
+            # thread keeps one open instead of connecting per request.
+            'CONN_MAX_AGE': int(os.getenv('DATABASE_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            # Behind PgBouncer in transaction mode, server-side cursors
+            # would not survive between statements.
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DATABASE_PGBOUNCER') == 'True',
+        }
+    }
+    REPLICA_LOCATION = 'HOST'
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'backend.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds a writer waits for the lock before "database is locked".
+                'timeout': 20,
+                'pragmas': {
+                    # Readers no longer block the writer, or the other way round.
+                    'journal_mode': 'WAL',
+                    # Safe with WAL: a power loss can only drop the last commits.
+                    'synchronous': 'NORMAL',
+                    'mmap_size': 256 * 1024 * 1024,
+                    'temp_store': 'MEMORY',
+                },
+            },
+        }
+    }
+    REPLICA_LOCATION = 'NAME'
+
+DATABASE_REPLICAS = []
+for i, location in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(','))):
+    DATABASE_REPLICAS.append(f'replica{i}')
+    DATABASES[f'replica{i}'] = {
+        **DATABASES['default'],
+        REPLICA_LOCATION: location.strip(),
+        'TEST': {'MIRROR': 'default'},
     }
-}
+
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
 
 '''
 
@@ -133,6 +197,44 @@ DATABASES = {
 '''
 
 
+# Cache
+# Responses of read-only API endpoints are cached here (see article.cache).
+# locmem is per process; use Redis when running several workers so that
+# invalidation reaches all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+if os.getenv('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 300))
+
+# JSON responses to GET/HEAD at least this large are gzip or brotli encoded
+# (see backend.middleware.CompressionMiddleware); compressed bodies of
+# responses with an ETag are kept in the API cache this long.
+API_COMPRESSION_MIN_SIZE = int(os.getenv('API_COMPRESSION_MIN_SIZE', 1024))
+API_COMPRESSION_CACHE_TIMEOUT = API_CACHE_TIMEOUT
+API_BROTLI_QUALITY = 5
+
+# Article detail responses embed only the latest N comments; the full thread
+# is paginated at /articles/articles/<id>/comments/. None embeds every comment.
+ARTICLE_INLINE_COMMENTS = 20
+
+# Comments a user may post, as "<count>/<s|min|hour|day>" (see
+# article.throttles); batch posts count every comment and may not exceed
+# the count. "none" (or an empty value) disables it.
+COMMENT_RATE_LIMIT = os.getenv('COMMENT_RATE_LIMIT', '30/min')
+
+# Anonymous article detail reads are served from pre-rendered JSON
+# (see article.snapshots), refreshed whenever the article changes.
+ARTICLE_SNAPSHOTS = True
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -164,6 +266,11 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Languages article translations are written in (ArticleContent.language),
+# negotiated per request from ?lang= and Accept-Language (see article.languages).
+ARTICLE_LANGUAGES = ['en', 'fr', 'ar']
+ARTICLE_DEFAULT_LANGUAGE = 'en'
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
@@ -194,6 +301,13 @@ CORS_ALLOW_ALL_ORIGINS= True
 
 #google
 GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
+GOOGLE_JWKS_URL = os.getenv('GOOGLE_JWKS_URL', 'https://www.googleapis.com/oauth2/v3/certs')
+# A local JWKS file to verify Google ID tokens against instead of GOOGLE_JWKS_URL.
+GOOGLE_JWKS_FILE = os.getenv('GOOGLE_JWKS_FILE')
+
+# Seconds ClaimsJWTAuthentication caches the user fields it needs (see
+# account.authentication.CACHED_USER_FIELDS).
+AUTH_USER_CACHE_TIMEOUT = 60
 
 
 #jwt token config
@@ -231,9 +345,13 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 
     "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
-    "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "account.serializers.UserTokenRefreshSerializer",
     "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
     "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
     "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
 }
+
+# Front blacklist checks with a bloom filter (see account.blacklist); needs a shared cache across processes.
+TOKEN_BLACKLIST_FILTER = os.getenv('TOKEN_BLACKLIST_FILTER') == 'True'
+TOKEN_BLACKLIST_FILTER_CAPACITY = 100_000
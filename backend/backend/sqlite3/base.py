@@ -0,0 +1,21 @@
+"""
+SQLite backend that applies ``OPTIONS['pragmas']`` to every new connection.
+
+Django 4.2 passes ``OPTIONS`` straight to ``sqlite3.connect`` and has no
+``init_command`` for SQLite, so per-connection pragmas such as
+``synchronous`` and ``mmap_size`` need this hook.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
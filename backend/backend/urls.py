@@ -17,10 +17,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .views import RequestMetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('account/', include("account.urls")),
     path('articles/', include('article.urls')),
+    path('metrics/requests/', RequestMetricsView.as_view(), name='request_metrics'),
 
 
 ]
@@ -0,0 +1,17 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .metrics import registry
+
+
+class RequestMetricsView(APIView):
+    """Latency histograms and query counts per view, from the requests this process sampled."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({'views': registry.snapshot()})
+
+    def delete(self, request):
+        registry.reset()
+        return Response(status=204)
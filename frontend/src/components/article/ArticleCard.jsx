@@ -5,8 +5,6 @@ import { Calendar, Tag, MessageCircle, User } from "lucide-react";
 import { Link } from "react-router-dom";
 
 function ArticleCard({ article, tags, categories }) {
-  const content = article.contents?.[0] || {};
-
   return (
     <>
       <div className="bg-white rounded-lg shadow-md overflow-hidden transition-transform duration-300 hover:scale-105">
@@ -15,10 +13,10 @@ function ArticleCard({ article, tags, categories }) {
             to={`/article/${article.id}/`}
             className="text-2xl font-semibold mb-2 text-gray-800"
           >
-            {content.title || "Untitled"}
+            {article.title || "Untitled"}
           </Link>
-          <p className="text-gray-600 mb-4 line-clamp-3">
-            {content.body || "No content available"}
+          <p className="text-gray-600 mb-4 line-clamp-3" lang={article.language || undefined}>
+            {article.excerpt || "No content available"}
           </p>
           <div className="flex items-center text-sm text-gray-500 mb-4">
             <User size={16} className="mr-2" />
@@ -42,7 +40,7 @@ function ArticleCard({ article, tags, categories }) {
           <div className="flex items-center justify-between text-sm text-gray-500">
             <span className="flex items-center">
               <MessageCircle size={16} className="mr-2" />
-              {article.comments?.length || 0} comments
+              {article.comments_count || 0} comments
             </span>
             <span className="bg-gray-100 text-gray-800 text-xs font-semibold px-2.5 py-0.5 rounded">
               {categories[article.category] || "Uncategorized"}
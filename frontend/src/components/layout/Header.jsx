@@ -25,7 +25,7 @@ const Header = () => {
   const checkAuthStatus = useCallback(async () => {
     try {
       const resp = await customAxios.get("articles/articles/");
-      dispatch(resultShertchArticle(resp.data));
+      dispatch(resultShertchArticle(resp.data.results));
       const response = await customAxios.get("account/userinfo/");
       setAuthState({ connected: response.status === 200, loading: false });
     } catch (error) {
@@ -70,8 +70,9 @@ const Header = () => {
         const response = await customAxios.get(url);
         console.log("Search response:", response.data);
 
-        dispatch(resultShertchArticle(response.data));
-        navigate("/", { state: { results: response.data } });
+        // First page only; response.data.next links to the rest.
+        dispatch(resultShertchArticle(response.data.results));
+        navigate("/", { state: { results: response.data.results, next: response.data.next } });
       } catch (error) {
         console.error("Search failed:", error);
 
@@ -1,13 +1,14 @@
-import { useQuery } from "react-query";
+import { useInfiniteQuery, useQuery } from "react-query";
 import ArticleCard from "../components/article/ArticleCard";
 import LoadingArticle from "../components/loading/LoadingArticle";
 import customAxios from "../services/api";
 import { useEffect } from "react";
 
-// Fetch articles
-const fetchArticles = async () => {
+// Fetch one page of articles: { next, previous, results }, where `next` is
+// the absolute URL of the following page (null on the last one)
+const fetchArticles = async ({ pageParam = "articles/articles/" }) => {
   try {
-    const { data } = await customAxios.get("articles/articles/");
+    const { data } = await customAxios.get(pageParam);
     return data;
   } catch (error) {
     console.error("Error fetching articles:", error);
@@ -39,7 +40,17 @@ const fetchCategories = async () => {
 
 function Home() {
   // Fetch articles using React Query
-  const { data: articlesData, isLoading: isLoadingArticles, isError: isErrorArticles } = useQuery("articles", fetchArticles);
+  const {
+    data: articlesData,
+    isLoading: isLoadingArticles,
+    isError: isErrorArticles,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery("articles", fetchArticles, {
+    getNextPageParam: (lastPage) => lastPage.next || undefined,
+  });
+  const articles = articlesData?.pages.flatMap((page) => page.results) || [];
 
   // Fetch tags using React Query
   const { data: tagsData, isLoading: isLoadingTags, isError: isErrorTags } = useQuery("tags", fetchTags);
@@ -87,8 +98,8 @@ function Home() {
         </div>
       ) : (
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-8">
-          {articlesData?.length ? (
-            articlesData.map((article) => (
+          {articles.length ? (
+            articles.map((article) => (
               <ArticleCard
                 key={article.id}
                 article={article}
@@ -101,6 +112,17 @@ function Home() {
           )}
         </div>
       )}
+      {hasNextPage && (
+        <div className="mt-8 text-center">
+          <button
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+            className="bg-primary text-white px-6 py-2 rounded-full hover:bg-blue-600 transition-colors disabled:opacity-50"
+          >
+            {isFetchingNextPage ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }